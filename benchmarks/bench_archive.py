@@ -0,0 +1,53 @@
+# benchmarks/bench_archive.py
+"""Random access to recorded games: a replay log (indexed by scanning the
+whole file on open) against a memory-mapped archive (index at the end).
+
+    python benchmarks/bench_archive.py --games 20000 --lookups 1000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ludo_archive import Archive, pack  # noqa: E402
+from ludo_replay import ReplayLog, ReplayWriter  # noqa: E402
+from ludo_sim import simulate  # noqa: E402
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--games", type=int, default=20_000)
+    ap.add_argument("--lookups", type=int, default=1000)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "games.lrl")
+        arc_path = os.path.join(tmp, "games.lra")
+        with open(log_path, "wb") as f:
+            simulate(args.games, seed=1, log=ReplayWriter(f))
+        pack(arc_path, [log_path])
+        picks = [(random.randrange(args.games), random.randrange(300)) for _ in range(args.lookups)]
+        print(f"{args.games} games, {os.path.getsize(log_path) / 1e6:.1f} MB; "
+              f"{args.lookups} random (game, ply) lookups")
+
+        t0 = time.perf_counter()
+        log = ReplayLog.open(log_path)
+        t1 = time.perf_counter()
+        for i, ply in picks:
+            log.position(i, ply)
+        t2 = time.perf_counter()
+        print(f"{'log':<9} open {1000 * (t1 - t0):9.1f} ms   lookups {1000 * (t2 - t1):8.1f} ms")
+
+        t0 = time.perf_counter()
+        archive = Archive(arc_path)
+        t1 = time.perf_counter()
+        for i, ply in picks:
+            archive[i].position(ply)
+        t2 = time.perf_counter()
+        print(f"{'archive':<9} open {1000 * (t1 - t0):9.1f} ms   lookups {1000 * (t2 - t1):8.1f} ms")
+        archive.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_codec.py
+"""Encode/decode throughput and size of the JSON and binary save formats.
+
+    python benchmarks/bench_codec.py --positions 2000 --players 4
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ludo import LudoGame  # noqa: E402
+
+def positions(n, players):
+    """n midgame positions from seeded random games."""
+    out = []
+    rng = random.Random(1)
+    game = LudoGame(players, rng=random.Random(2))
+    while len(out) < n:
+        moves = game.legal_moves(game.current_turn, game.roll_dice())
+        if moves:
+            game.play(rng.choice(moves))
+        else:
+            game.pass_turn()
+        if game.winner_index() is not None:
+            game.restart()
+        out.append(game.clone())
+    return out
+
+# name -> (encode(game) -> bytes, decode(bytes) -> game)
+CODECS = {
+    "json (save)": (lambda g: json.dumps(g.to_dict(), indent=2).encode(),
+                    lambda b: LudoGame.from_dict(json.loads(b))),
+    "json compact": (lambda g: json.dumps(g.to_dict(), separators=(",", ":")).encode(),
+                     lambda b: LudoGame.from_dict(json.loads(b))),
+    "binary": (lambda g: g.to_bytes(), LudoGame.from_bytes),
+}
+
+def rate(fn, items, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for x in items:
+            fn(x)
+        best = min(best, time.perf_counter() - t0)
+    return len(items) / best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--positions", type=int, default=2000)
+    ap.add_argument("--players", type=int, default=4, choices=(2, 3, 4))
+    args = ap.parse_args()
+    games = positions(args.positions, args.players)
+    print(f"{'format':<14}{'bytes':>8}{'encode/s':>12}{'decode/s':>12}")
+    for name, (encode, decode) in CODECS.items():
+        blobs = [encode(g) for g in games]
+        size = sum(map(len, blobs)) / len(blobs)
+        print(f"{name:<14}{size:>8.0f}{rate(encode, games):>12,.0f}{rate(decode, blobs):>12,.0f}")
+
+if __name__ == "__main__":
+    main()
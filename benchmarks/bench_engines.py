@@ -0,0 +1,33 @@
+# benchmarks/bench_engines.py
+"""Throughput of the object engine (ludo_sim) vs the NumPy batch engine (ludo_vec).
+
+    python benchmarks/bench_engines.py --games 20000 --players 4
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ludo_sim import simulate  # noqa: E402
+from ludo_vec import simulate_vec  # noqa: E402
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--games", type=int, default=20_000)
+    ap.add_argument("--players", type=int, default=4)
+    ap.add_argument("--policy", default="random", choices=("first", "random"))
+    ap.add_argument("--batches", default="256,1024,4096")
+    args = ap.parse_args()
+
+    obj = simulate(args.games, args.players, args.policy, seed=1)
+    base = obj.games / obj.elapsed
+    print(f"{'engine':<22}{'games/sec':>12}{'speedup':>10}")
+    print(f"{'object (LudoGame)':<22}{base:>12,.0f}{1.0:>9.1f}x")
+    for b in (int(x) for x in args.batches.split(",")):
+        vec = simulate_vec(args.games, b, args.players, args.policy, seed=1)
+        rate = vec.games / vec.elapsed
+        print(f"{'numpy batch=' + str(b):<22}{rate:>12,.0f}{rate / base:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
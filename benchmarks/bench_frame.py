@@ -0,0 +1,91 @@
+# benchmarks/bench_frame.py
+"""Per-frame cost of drawing and presenting the window, headless (SDL dummy
+driver). The game advances one ply every --ply-every frames, so the dirty
+rectangle configuration sees both idle frames and moves.
+
+    python benchmarks/bench_frame.py --frames 600
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame  # noqa: E402
+from ludo import LudoGame  # noqa: E402
+from ui_pygame import UI, W, H  # noqa: E402
+
+def midgame(plies=120, players=4):
+    game = LudoGame(players, rng=random.Random(1))
+    for _ in range(plies):
+        moves = game.legal_moves(game.current_turn, game.roll_dice())
+        game.play(moves[0]) if moves else game.pass_turn()
+    game.roll_dice()
+    return game
+
+def step(game):
+    """One ply: roll if needed, else play the first legal move."""
+    if game.winner_index() is not None:
+        return
+    if game.dice_value is None:
+        if not game.legal_moves(game.current_turn, game.roll_dice()):
+            game.pass_turn()
+        return
+    game.play(game.legal_moves(game.current_turn, game.dice_value)[0])
+
+def full_frame(ui, screen):
+    ui.draw(screen)
+    pygame.display.flip()
+
+def dirty_frame(ui, screen):
+    rects = ui.render(screen)
+    if rects:
+        pygame.display.update(rects)
+
+def run(frames, configure, frame, ply_every):
+    screen = pygame.display.get_surface()
+    ui = UI(midgame())
+    configure(ui)
+    frame(ui, screen)   # warm-up (builds caches)
+    ui.text_cache.reset_stats()
+    times = []
+    for i in range(frames):
+        if ply_every and i % ply_every == 0:
+            step(ui.game)
+        t0 = time.perf_counter()
+        frame(ui, screen)
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return (sum(times) / len(times), times[len(times) // 2], times[int(len(times) * 0.95)],
+            ui.text_cache)
+
+# name -> (function that switches a fresh UI to that configuration, frame function)
+CONFIGS = {
+    "uncached board": (lambda ui: setattr(ui, "cache_board", False), full_frame),
+    "no text cache": (lambda ui: setattr(ui.text_cache, "maxsize", 0), full_frame),
+    "no sprites": (lambda ui: setattr(ui, "use_sprites", False), full_frame),
+    "cached board": (lambda ui: None, full_frame),
+    "image board": (lambda ui: ui.set_theme("image"), full_frame),
+    "dirty rects": (lambda ui: None, dirty_frame),
+}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=600)
+    ap.add_argument("--ply-every", type=int, default=15)
+    args = ap.parse_args()
+    pygame.init()
+    pygame.display.set_mode((W, H))
+    print(f"{'configuration':<20}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'text hit':>10}{'text miss':>10}")
+    for name, (configure, frame) in CONFIGS.items():
+        mean, p50, p95, tc = run(args.frames, configure, frame, args.ply_every)
+        print(f"{name:<20}{mean:>10.3f}{p50:>10.3f}{p95:>10.3f}"
+              f"{tc.hits:>10}{tc.misses:>10}")
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_memory.py
+"""Bytes per live LudoGame, measured with tracemalloc.
+
+    python benchmarks/bench_memory.py --games 20000 --players 4
+"""
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ludo import LudoGame  # noqa: E402
+from ludo_sim import policy_random  # noqa: E402
+
+def _midgame(game: LudoGame, plies: int):
+    """Advance a game some plies so tokens are spread over the board."""
+    for _ in range(plies):
+        idx = game.current_turn
+        dice = game.roll_dice()
+        tid = policy_random(game, game.players[idx], dice)
+        if tid is None:
+            game.apply_pass()
+        else:
+            game.apply_move(idx, tid)
+        if game.winner_index() is not None:
+            break
+
+def measure(games: int, players: int, plies: int) -> float:
+    random.seed(1)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    live = []
+    for _ in range(games):
+        g = LudoGame(players_count=players)
+        _midgame(g, plies)
+        live.append(g)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    return total / games
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--games", type=int, default=20_000)
+    ap.add_argument("--players", type=int, default=4)
+    ap.add_argument("--plies", type=int, default=120)
+    args = ap.parse_args()
+    fresh = measure(args.games, args.players, 0)
+    mid = measure(args.games, args.players, args.plies)
+    print(f"bytes per live game ({args.players} players): "
+          f"new {fresh:,.0f}   after {args.plies} plies {mid:,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
 # ludo.py
+import os
 import random
 import json
-from dataclasses import dataclass, asdict, field
-from typing import List, Optional, Tuple
+import struct
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
 
 # Constants
 TOKENS_PER_PLAYER = 4
 RING_LEN = 52
 HOME_LEN = 6
+# Progress along a player's own track: -1 base, 0..51 ring, 52..56 home
+FINISH_PROGRESS = RING_LEN + HOME_LEN - 1   # 57
 # Safe squares (global ring indices) — classic pattern
 SAFE_GLOBAL_INDICES = {0, 8, 13, 21, 26, 34, 39, 47}
 
@@ -19,45 +23,107 @@ SEATS = [
     ("Blue",   (60, 120, 220), 39),
 ]
 
-@dataclass
+class TokenState(IntEnum):
+    BASE = 0
+    RING = 1
+    HOME = 2
+    FINISHED = 3
+
+BASE, RING, HOME, FINISHED = TokenState.BASE.value, TokenState.RING.value, \
+    TokenState.HOME.value, TokenState.FINISHED.value
+STATE_NAMES = ("base", "ring", "home", "finished")
+_STATE_CODES = {name: code for code, name in enumerate(STATE_NAMES)}
+
 class Token:
-    id: int
-    state: str = "base"    # base, ring, home, finished
-    ring_rel: int = -1     # 0..51 relative to player's entry when on ring
-    home_idx: int = -1     # 0..5 when in home path
+    """One pawn. `state` reads/writes as the strings "base", "ring", "home",
+    "finished" but is stored as a small int (`code`)."""
+    __slots__ = ("id", "code", "ring_rel", "home_idx")
+    __hash__ = None   # compared by value, like the dataclass it replaces
+
+    def __init__(self, id: int, state="base", ring_rel: int = -1, home_idx: int = -1):
+        self.id = id
+        self.code = _STATE_CODES[state] if isinstance(state, str) else int(state)
+        self.ring_rel = ring_rel    # 0..51 relative to player's entry when on ring
+        self.home_idx = home_idx    # 0..5 when in home path
+
+    @property
+    def state(self) -> str:
+        return STATE_NAMES[self.code]
+
+    @state.setter
+    def state(self, value):
+        self.code = _STATE_CODES[value] if isinstance(value, str) else int(value)
+
+    def to_dict(self):
+        return {"id": self.id, "state": STATE_NAMES[self.code],
+                "ring_rel": self.ring_rel, "home_idx": self.home_idx}
+
+    def __eq__(self, other):
+        if not isinstance(other, Token):
+            return NotImplemented
+        return (self.id, self.code, self.ring_rel, self.home_idx) == \
+            (other.id, other.code, other.ring_rel, other.home_idx)
+
+    def __repr__(self):
+        return (f"Token(id={self.id!r}, state={self.state!r}, "
+                f"ring_rel={self.ring_rel!r}, home_idx={self.home_idx!r})")
+
+    @property
+    def progress(self) -> int:
+        """Single-int position: -1 base, 0..51 ring, 52..56 home, 57 finished."""
+        code = self.code
+        if code == RING:
+            return self.ring_rel
+        if code == HOME:
+            return RING_LEN + self.home_idx
+        if code == FINISHED:
+            return FINISH_PROGRESS
+        return -1
 
     def is_movable_with(self, dice: int) -> bool:
-        if self.state == "finished":
-            return False
-        if self.state == "base":
+        code = self.code
+        if code == RING:
+            # stays on ring, or enters home without overshooting
+            return self.ring_rel + dice <= FINISH_PROGRESS
+        if code == BASE:
             return dice == 6
-        if self.state == "ring":
-            # If stays on ring
-            if self.ring_rel + dice < RING_LEN:
-                return True
-            # would enter home
-            steps_into_home = self.ring_rel + dice - (RING_LEN - 1) - 1
-            return steps_into_home <= (HOME_LEN - 1)
-        if self.state == "home":
+        if code == HOME:
             return (self.home_idx + dice) <= (HOME_LEN - 1)
         return False
 
-@dataclass
 class Player:
-    name: str
-    color: Tuple[int,int,int]
-    entry_global: int
-    tokens: List[Token] = field(default_factory=list)
+    __slots__ = ("name", "color", "entry_global", "tokens")
+    __hash__ = None
+
+    def __init__(self, name: str, color: Tuple[int, int, int], entry_global: int,
+                 tokens: Optional[List[Token]] = None):
+        self.name = name
+        self.color = color
+        self.entry_global = entry_global
+        self.tokens: List[Token] = [] if tokens is None else tokens
+
+    def __eq__(self, other):
+        if not isinstance(other, Player):
+            return NotImplemented
+        return (self.name, self.color, self.entry_global, self.tokens) == \
+            (other.name, other.color, other.entry_global, other.tokens)
+
+    def __repr__(self):
+        return (f"Player(name={self.name!r}, color={self.color!r}, "
+                f"entry_global={self.entry_global!r}, tokens={self.tokens!r})")
 
     def all_finished(self) -> bool:
-        return all(t.state == "finished" for t in self.tokens)
+        for t in self.tokens:
+            if t.code != FINISHED:
+                return False
+        return True
 
     def to_dict(self):
         return {
             "name": self.name,
             "color": self.color,
             "entry_global": self.entry_global,
-            "tokens": [asdict(t) for t in self.tokens],
+            "tokens": [t.to_dict() for t in self.tokens],
         }
 
     @staticmethod
@@ -66,14 +132,227 @@ class Player:
         p.tokens = [Token(**tok) for tok in d["tokens"]]
         return p
 
+def _check_token(t: Token):
+    """Raise ValueError unless `t` is in a known state with its square
+    field in range (ring_rel 0..51 on the ring, home_idx 0..4 at home)."""
+    code = t.code
+    if code == RING:
+        ok = type(t.ring_rel) is int and 0 <= t.ring_rel < RING_LEN
+    elif code == HOME:
+        ok = type(t.home_idx) is int and 0 <= t.home_idx < HOME_LEN - 1
+    else:
+        ok = code in (BASE, FINISHED)
+    if not ok:
+        raise ValueError(f"bad token {t!r}")
+
+# DEST[progress + 1][dice] -> destination progress, or -1 if illegal.
+# Rows cover progress -1 (base) .. 57 (finished); column 0 is unused.
+DEST: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple((0 if (p == -1 and d == 6) else -1) if p == -1
+          else (p + d if 0 < d and p + d <= FINISH_PROGRESS else -1)
+          for d in range(7))
+    for p in range(-1, FINISH_PROGRESS + 1)
+)
+
+class Move:
+    """A legal move from LudoGame.legal_moves(); execute with make_move()/play().
+
+    src/dst are track progress values (-1 base .. 57 finished), `square` is
+    the global ring square landed on (None off the ring) and `capture` says
+    whether an opponent will be sent home.
+    """
+    __slots__ = ("player_idx", "token", "dice", "src", "dst", "square", "capture")
+
+    def __init__(self, player_idx: int, token: Token, dice: int, src: int, dst: int,
+                 square: Optional[int], capture: bool):
+        self.player_idx = player_idx
+        self.token = token
+        self.dice = dice
+        self.src = src
+        self.dst = dst
+        self.square = square
+        self.capture = capture
+
+    @property
+    def token_id(self) -> int:
+        return self.token.id
+
+    def __repr__(self):
+        return (f"Move(player={self.player_idx}, token={self.token.id}, {self.src}->{self.dst}"
+                f"{', capture' if self.capture else ''})")
+
+# Zobrist keys: one 64-bit value per (seat, token, progress), per side to
+# move and per pending dice (index 0 = no dice). Generated from a fixed seed
+# so hashes are identical on every machine and Python build.
+def _zobrist_tables():
+    r = random.Random(0x10D0)
+    tokens = tuple(tuple(tuple(r.getrandbits(64) for _ in range(FINISH_PROGRESS + 2))
+                         for _ in range(TOKENS_PER_PLAYER))
+                   for _ in range(len(SEATS)))
+    turn = tuple(r.getrandbits(64) for _ in range(len(SEATS)))
+    dice = tuple(r.getrandbits(64) for _ in range(7))
+    return tokens, turn, dice
+
+ZOBRIST_TOKENS, ZOBRIST_TURN, ZOBRIST_DICE = _zobrist_tables()
+
+# ----------------- Binary save format -----------------
+# Files ending in BINARY_SUFFIX hold LudoGame.to_bytes(), anything else JSON.
+#   header   "LUDO", version, flags, players, turn, dice (0 = none)
+#   [u32]    journal generation, if flags & SAVE_HAS_JOURNAL
+#   per player: one byte: seat index (bits 0-1), PLAYER_CUSTOM (name/colour/
+#            entry differ from SEATS[seat]), PLAYER_RAW_TOKENS; then
+#     custom: entry, r, g, b, name length, UTF-8 name
+#     tokens: 4 bytes of progress + 1, or if raw: count and per token
+#             (id, code, ring_rel, home_idx) for ids/fields that are not
+#             the usual 1..4 / canonical ones
+BINARY_SUFFIX = ".ludo"
+SAVE_MAGIC = b"LUDO"
+SAVE_VERSION = 1
+SAVE_HAS_JOURNAL = 0x01
+PLAYER_CUSTOM = 0x40
+PLAYER_RAW_TOKENS = 0x80
+_HEADER = struct.Struct("<4sBBBBB")
+_GENERATION = struct.Struct("<I")
+_RAW_TOKEN = struct.Struct("<Bbbb")
+
+# (code, ring_rel, home_idx) of a token at progress p, indexed by p + 1
+PROGRESS_FIELDS: Tuple[Tuple[int, int, int], ...] = tuple(
+    (BASE, -1, -1) if p < 0 else
+    (RING, p, -1) if p < RING_LEN else
+    (HOME, -1, p - RING_LEN) if p < FINISH_PROGRESS else
+    (FINISHED, -1, -1)
+    for p in range(-1, FINISH_PROGRESS + 1)
+)
+
+# ----------------- JSON save schemas -----------------
+# 1  the original ludo_save.json: players {"name", "idx" (seat), "color"
+#    (a name such as "red"), "tokens": [{"pos", "completed"}]}, where pos
+#    is the token's progress along its own track (-1 in base)
+# 2  the current to_dict() format (players carry "entry_global")
+# Older dicts are detected by shape and upgraded in memory on load.
+JSON_SCHEMA = 2
+COLOR_NAMES = {name.lower(): color for name, color, _ in SEATS}
+
+def json_schema(data: dict) -> int:
+    """Schema version of a save dict (see JSON_SCHEMA)."""
+    players = data.get("players") if isinstance(data, dict) else None
+    if not isinstance(players, list):
+        raise ValueError("not a Ludo save: no player list")
+    if players and isinstance(players[0], dict) and "entry_global" not in players[0] \
+            and ("idx" in players[0] or isinstance(players[0].get("color"), str)):
+        return 1
+    return JSON_SCHEMA
+
+def _upgrade_v1(data: dict) -> dict:
+    players = []
+    for i, pd in enumerate(data["players"]):
+        seat = pd.get("idx", i)
+        color = pd.get("color")
+        if isinstance(color, str):
+            if color.lower() not in COLOR_NAMES:
+                raise ValueError(f"unknown colour {color!r}")
+            color = COLOR_NAMES[color.lower()]
+        elif color is None:
+            color = SEATS[seat][1]
+        tokens = []
+        for j, td in enumerate(pd["tokens"]):
+            pos = int(td.get("pos", -1))
+            if td.get("completed") or pos >= FINISH_PROGRESS:
+                pos = FINISH_PROGRESS
+            if pos < -1:
+                raise ValueError(f"bad token position {pos}")
+            code, ring_rel, home_idx = PROGRESS_FIELDS[pos + 1]
+            tokens.append({"id": j + 1, "state": STATE_NAMES[code],
+                           "ring_rel": ring_rel, "home_idx": home_idx})
+        players.append({"name": pd.get("name", SEATS[seat][0]), "color": list(color),
+                        "entry_global": SEATS[seat][2], "tokens": tokens})
+    return {"current_turn": data.get("current_turn", 0),
+            "dice_value": data.get("dice_value"), "players": players}
+
+# schema -> function upgrading a dict of that schema to the next one
+_JSON_UPGRADES = {1: _upgrade_v1}
+
+def upgrade_save(data: dict) -> dict:
+    """`data` in the current to_dict() format, upgrading older schemas.
+    Raises ValueError if it is not a Ludo save."""
+    version = json_schema(data)
+    try:
+        while version < JSON_SCHEMA:
+            data = _JSON_UPGRADES[version](data)
+            version += 1
+    except (KeyError, IndexError, TypeError, AttributeError) as e:
+        raise ValueError(f"corrupt schema {version} Ludo save: {e!r}") from None
+    return data
+
+def atomic_write(path: str, data: bytes):
+    """Replace `path` with `data` so that a crash leaves either the old or
+    the new file, never a torn one: write a temp file, fsync, rename."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    try:        # make the rename itself durable (POSIX)
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
 class LudoGame:
-    def __init__(self, players_count: int = 2):
+    # Turn on (e.g. in tests) to verify the occupancy index and Zobrist hash
+    # against a full rescan after every move.
+    debug_index: bool = False
+
+    def __init__(self, players_count: int = 2, rng: Optional[random.Random] = None):
+        # Dice source; any object with randint/randrange (defaults to the
+        # global `random` module). Pass a seeded random.Random for
+        # reproducible or parallel simulation.
+        self.rng = random if rng is None else rng
         self.players: List[Player] = []
-        self.current_turn: int = 0
-        self.dice_value: Optional[int] = None
+        # 64-bit position hash (tokens, side to move, pending dice), kept up
+        # to date incrementally; current_turn/dice_value are properties so
+        # assignments keep it in sync.
+        self.zobrist: int = 0
+        self._turn: int = 0
+        self._dice: Optional[int] = None
         self.awaiting_move: bool = False
+        # Undo records of moves/passes made via move_token/pass_turn
+        self.history: List[tuple] = []
+        # Ring occupancy index: global square -> [(player_idx, token), ...].
+        # Sparse (only occupied squares have a key) to keep live games small.
+        self._occ: Dict[int, List[Tuple[int, Token]]] = {}
+        # Bumped on every token change; keys the legal_moves() cache
+        self._version = 0
+        self._moves_key: Optional[Tuple[int, int, int]] = None
+        self._moves: Tuple[Move, ...] = ()
+        # ludo_journal.GameJournal recording rolls/moves/passes, or None
+        self.journal = None
         self.reset_players(players_count)
 
+    @property
+    def current_turn(self) -> int:
+        return self._turn
+
+    @current_turn.setter
+    def current_turn(self, value: int):
+        self.zobrist ^= ZOBRIST_TURN[self._turn] ^ ZOBRIST_TURN[value]
+        self._turn = value
+
+    @property
+    def dice_value(self) -> Optional[int]:
+        return self._dice
+
+    @dice_value.setter
+    def dice_value(self, value: Optional[int]):
+        self.zobrist ^= ZOBRIST_DICE[self._dice or 0] ^ ZOBRIST_DICE[value or 0]
+        self._dice = value
+
     # ----------------- Player/Token CRUD -----------------
     def reset_players(self, count: int):
         self.players.clear()
@@ -86,6 +365,28 @@ class LudoGame:
         self.current_turn = 0
         self.dice_value = None
         self.awaiting_move = False
+        self.history.clear()
+        self.rebuild_index()
+        if self.journal is not None:
+            self.journal.snapshot(self)
+
+    def restart(self):
+        """Send every token back to base and start a new game with the same
+        seats. Reuses the existing Player/Token objects (no allocation)."""
+        for p in self.players:
+            for t in p.tokens:
+                t.code = BASE
+                t.ring_rel = -1
+                t.home_idx = -1
+        self._occ.clear()
+        self._version += 1
+        self.history.clear()
+        self.current_turn = 0
+        self.dice_value = None
+        self.awaiting_move = False
+        self.zobrist = self.compute_zobrist()
+        if self.journal is not None:
+            self.journal.snapshot(self)
 
     def add_player(self) -> bool:
         if len(self.players) >= 4:
@@ -94,123 +395,563 @@ class LudoGame:
         name, color, entry = SEATS[idx]
         p = Player(name, color, entry)
         p.tokens = [Token(id=j+1) for j in range(TOKENS_PER_PLAYER)]
-        self.players.append(p)
+        self.players.append(p)   # new tokens start in base: index unchanged
+        self.zobrist = self.compute_zobrist()
+        self._version += 1
+        self.history.clear()
+        if self.journal is not None:
+            self.journal.snapshot(self)
         return True
 
     def remove_player(self) -> bool:
         if len(self.players) <= 2:
             return False
         self.players.pop()
+        removed = len(self.players)
+        for sq, occ in list(self._occ.items()):
+            occ[:] = [e for e in occ if e[0] != removed]
+            if not occ:
+                del self._occ[sq]
         self.current_turn %= len(self.players)
+        self.zobrist = self.compute_zobrist()
+        self._version += 1
+        self.history.clear()
+        if self.journal is not None:
+            self.journal.snapshot(self)
         return True
 
-    def save(self, path="savegame.json"):
-        data = {
+    def to_dict(self):
+        return {
             "current_turn": self.current_turn,
             "dice_value": self.dice_value,
             "players": [p.to_dict() for p in self.players],
         }
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2)
 
-    def load(self, path="savegame.json") -> bool:
+    def set_state(self, data):
+        """Replace the position with a dict in the to_dict()/save format
+        (older save schemas are upgraded, see upgrade_save())."""
+        data = upgrade_save(data)
         try:
-            with open(path, "r") as f:
-                data = json.load(f)
-        except FileNotFoundError:
-            return False
-        self.current_turn = data.get("current_turn", 0)
-        self.dice_value = data.get("dice_value", None)
-        self.players = [Player.from_dict(pd) for pd in data["players"]]
+            players = [Player.from_dict(pd) for pd in data["players"]]
+            for p in players:
+                for t in p.tokens:
+                    if type(t.id) is not int or not 1 <= t.id <= TOKENS_PER_PLAYER:
+                        raise ValueError(f"bad token id {t.id!r}")
+                    _check_token(t)
+        except (KeyError, IndexError, TypeError, AttributeError, ValueError) as e:
+            raise ValueError(f"corrupt Ludo save: {e!r}") from None
+        turn = data.get("current_turn", 0)
+        dice = data.get("dice_value", None)
+        if type(turn) is not int or not 0 <= turn < max(len(players), 2):
+            raise ValueError(f"corrupt Ludo save: current_turn {turn!r}")
+        if dice is not None and (type(dice) is not int or not 1 <= dice <= 6):
+            raise ValueError(f"corrupt Ludo save: dice_value {dice!r}")
+        self.current_turn = turn
+        self.dice_value = dice
+        self.players = players
         if len(self.players) < 2:
             self.reset_players(2)
         self.awaiting_move = self.dice_value is not None
+        self.history.clear()
+        self.rebuild_index()
+        if self.journal is not None:
+            self.journal.snapshot(self)
+
+    @staticmethod
+    def from_dict(data, rng=None) -> "LudoGame":
+        g = LudoGame(len(data["players"]), rng)
+        g.set_state(data)
+        return g
+
+    def to_bytes(self, journal: Optional[int] = None) -> bytes:
+        """Compact binary form of to_dict() (see BINARY_SUFFIX): 19 bytes
+        for a normal 2-player game, 29 for 4. `journal` is a
+        ludo_journal snapshot generation to store in the header."""
+        out = bytearray(_HEADER.pack(SAVE_MAGIC, SAVE_VERSION,
+                                     0 if journal is None else SAVE_HAS_JOURNAL,
+                                     len(self.players), self._turn, self._dice or 0))
+        if journal is not None:
+            out += _GENERATION.pack(journal)
+        for i, p in enumerate(self.players):
+            tokens = p.tokens
+            seat = i & 3
+            flags = seat
+            if (p.name, p.color, p.entry_global) != SEATS[seat]:
+                flags |= PLAYER_CUSTOM
+            progress = []
+            if len(tokens) == TOKENS_PER_PLAYER:
+                for j, t in enumerate(tokens):
+                    pg = t.progress
+                    if t.id != j + 1 or PROGRESS_FIELDS[pg + 1] != (t.code, t.ring_rel, t.home_idx):
+                        break
+                    progress.append(pg + 1)
+            if len(progress) != TOKENS_PER_PLAYER:
+                flags |= PLAYER_RAW_TOKENS
+            out.append(flags)
+            if flags & PLAYER_CUSTOM:
+                name = p.name.encode("utf-8")
+                out += bytes((p.entry_global, *p.color, len(name))) + name
+            if flags & PLAYER_RAW_TOKENS:
+                out.append(len(tokens))
+                for t in tokens:
+                    out += _RAW_TOKEN.pack(t.id, t.code, t.ring_rel, t.home_idx)
+            else:
+                out += bytes(progress)
+        return bytes(out)
+
+    def set_bytes(self, data: bytes) -> Optional[int]:
+        """Replace the position with a to_bytes() encoding, like set_state().
+        Returns the journal generation stored in it, if any. Raises
+        ValueError for data that is not a save of a known version."""
+        try:
+            magic, version, flags, count, turn, dice = _HEADER.unpack_from(data, 0)
+            if magic != SAVE_MAGIC or version != SAVE_VERSION:
+                raise ValueError(f"not a version {SAVE_VERSION} Ludo save")
+            pos = _HEADER.size
+            journal = None
+            if flags & SAVE_HAS_JOURNAL:
+                journal, = _GENERATION.unpack_from(data, pos)
+                pos += _GENERATION.size
+            players = []
+            for _ in range(count):
+                pflags = data[pos]
+                pos += 1
+                name, color, entry = SEATS[pflags & 3]
+                if pflags & PLAYER_CUSTOM:
+                    entry, r, g, b, n = data[pos:pos + 5]
+                    color = (r, g, b)
+                    name = data[pos + 5:pos + 5 + n].decode("utf-8")
+                    pos += 5 + n
+                if pflags & PLAYER_RAW_TOKENS:
+                    n = data[pos]
+                    pos += 1
+                    tokens = []
+                    for _ in range(n):
+                        tokens.append(Token(*_RAW_TOKEN.unpack_from(data, pos)))
+                        pos += _RAW_TOKEN.size
+                else:
+                    tokens = [Token(j + 1, *PROGRESS_FIELDS[data[pos + j]])
+                              for j in range(TOKENS_PER_PLAYER)]
+                    pos += TOKENS_PER_PLAYER
+                for t in tokens:
+                    _check_token(t)
+                players.append(Player(name, color, entry, tokens))
+        except (struct.error, IndexError, KeyError) as e:
+            raise ValueError(f"corrupt Ludo save: {e}") from None
+        if not 2 <= count <= len(SEATS) or not 0 <= turn < count or dice > 6:
+            raise ValueError(f"corrupt Ludo save: {count} players, turn {turn}, dice {dice}")
+        self.players = players
+        self.current_turn = turn
+        self.dice_value = dice or None
+        self.awaiting_move = self.dice_value is not None
+        self.history.clear()
+        self.rebuild_index()
+        if self.journal is not None:
+            self.journal.snapshot(self)
+        return journal
+
+    @staticmethod
+    def from_bytes(data: bytes, rng=None) -> "LudoGame":
+        g = LudoGame(2, rng)
+        g.set_bytes(data)
+        return g
+
+    def save_data(self, path: str, journal: Optional[int] = None) -> bytes:
+        """File contents for saving to `path`: to_bytes() for *.ludo,
+        otherwise the JSON form (with a "journal" key if given)."""
+        if path.endswith(BINARY_SUFFIX):
+            return self.to_bytes(journal)
+        data = self.to_dict()
+        if journal is not None:
+            data["journal"] = journal
+        return json.dumps(data, indent=2).encode()
+
+    def set_save_data(self, path: str, raw: bytes) -> Optional[int]:
+        """Inverse of save_data(); returns the journal generation, if any."""
+        if path.endswith(BINARY_SUFFIX):
+            return self.set_bytes(raw)
+        data = json.loads(raw)
+        self.set_state(data)
+        return data.get("journal")
+
+    def save(self, path="savegame.json"):
+        """Write the position to `path` atomically, in binary if it ends in
+        BINARY_SUFFIX and as JSON otherwise. With a journal on
+        `path` attached this is simply an early journal snapshot (other
+        journal hooks, like a replay writer's, have no path)."""
+        if self.journal is not None and getattr(self.journal, "path", None) == path:
+            self.journal.snapshot(self)
+            return
+        atomic_write(path, self.save_data(path))
+
+    def load(self, path="savegame.json") -> bool:
+        """Load a save (binary for *.ludo, else JSON); if it was written by
+        a ludo_journal.GameJournal the moves journaled since that snapshot
+        are replayed on top."""
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return False
+        journal, self.journal = self.journal, None
+        try:
+            generation = self.set_save_data(path, raw)
+            if generation is not None:
+                from ludo_journal import replay_journal
+                replay_journal(self, path, generation)
+        finally:
+            self.journal = journal
+        if journal is not None:
+            journal.snapshot(self)
         return True
 
+    def clone(self, rng=None) -> "LudoGame":
+        """Independent copy of the position (players, tokens, turn, dice).
+        History is not copied. Used by bots to search off the UI thread."""
+        g = LudoGame(len(self.players), rng)
+        g.players = [Player(p.name, p.color, p.entry_global,
+                            [Token(t.id, t.code, t.ring_rel, t.home_idx) for t in p.tokens])
+                     for p in self.players]
+        g.current_turn = self.current_turn
+        g.dice_value = self.dice_value
+        g.awaiting_move = self.awaiting_move
+        g.rebuild_index()
+        return g
+
+    # ----------------- Occupancy index -----------------
+    def rebuild_index(self):
+        """Recompute the ring occupancy index from scratch. Call this after
+        editing token fields directly. Also recomputes the Zobrist hash."""
+        self._version += 1
+        self._occ.clear()
+        for idx, p in enumerate(self.players):
+            for t in p.tokens:
+                if t.code == RING:
+                    self._index_add((p.entry_global + t.ring_rel) % RING_LEN, idx, t)
+        self.zobrist = self.compute_zobrist()
+
+    def compute_zobrist(self) -> int:
+        """Zobrist hash of the position computed from scratch."""
+        h = ZOBRIST_TURN[self._turn] ^ ZOBRIST_DICE[self._dice or 0]
+        for idx, p in enumerate(self.players):
+            keys = ZOBRIST_TOKENS[idx]
+            for t in p.tokens:
+                h ^= keys[(t.id - 1) % TOKENS_PER_PLAYER][t.progress + 1]
+        return h
+
+    def check_index(self):
+        """Raise AssertionError if the occupancy index disagrees with a rescan."""
+        expected: List[List[Tuple[int, int]]] = [[] for _ in range(RING_LEN)]
+        for idx, p in enumerate(self.players):
+            for t in p.tokens:
+                if t.code == RING:
+                    expected[(p.entry_global + t.ring_rel) % RING_LEN].append((idx, id(t)))
+        assert all(self._occ.values()), "empty occupancy bucket"
+        for sq in range(RING_LEN):
+            got = sorted((i, id(t)) for i, t in self._occ.get(sq, ()))
+            assert got == sorted(expected[sq]), f"occupancy mismatch on square {sq}: {got} != {expected[sq]}"
+        assert self.zobrist == self.compute_zobrist(), "stale Zobrist hash"
+
+    def occupants(self, square: int) -> List[Tuple[int, Token]]:
+        """(player_idx, token) pairs on global ring square `square`."""
+        return self._occ.get(square % RING_LEN, [])
+
+    def is_occupied(self, square: int) -> bool:
+        return (square % RING_LEN) in self._occ
+
+    def is_blockade(self, square: int) -> bool:
+        """Two or more tokens of the same player on one square."""
+        occ = self._occ.get(square % RING_LEN)
+        if occ is None or len(occ) < 2:
+            return False
+        seen = 0
+        for idx, _ in occ:
+            if seen & (1 << idx):
+                return True
+            seen |= 1 << idx
+        return False
+
+    def _index_add(self, square: int, player_idx: int, token: Token):
+        occ = self._occ.get(square)
+        if occ is None:
+            self._occ[square] = [(player_idx, token)]
+        else:
+            occ.append((player_idx, token))
+
+    def _index_remove(self, square: int, token: Token):
+        occ = self._occ[square]
+        if len(occ) == 1:
+            del self._occ[square]
+            return
+        for i, entry in enumerate(occ):
+            if entry[1] is token:
+                del occ[i]
+                return
+
     # ----------------- Gameplay -----------------
     def roll_dice(self) -> int:
-        self.dice_value = random.randint(1, 6)
+        dice = self.rng.randint(1, 6)
+        self.zobrist ^= ZOBRIST_DICE[self._dice or 0] ^ ZOBRIST_DICE[dice]
+        self._dice = dice
         self.awaiting_move = True
-        return self.dice_value
+        if self.journal is not None:
+            self.journal.roll(dice)
+        return dice
 
     def current_player(self) -> Player:
         return self.players[self.current_turn]
 
     def global_index_of(self, player: Player, token: Token) -> Optional[int]:
-        if token.state != "ring":
+        if token.code != RING:
             return None
         return (player.entry_global + token.ring_rel) % RING_LEN
 
     def can_move_any(self, player: Player, dice: int) -> bool:
-        return any(t.is_movable_with(dice) for t in player.tokens)
+        for t in player.tokens:
+            if t.is_movable_with(dice):
+                return True
+        return False
+
+    def legal_moves(self, player_idx: int, dice: int) -> Tuple[Move, ...]:
+        """All legal moves of player `player_idx` for `dice`, in token order.
+
+        The result is cached until the next token change, so the UI, the
+        main loop and bots share one computation per roll. Do not mutate it.
+        """
+        key = (self._version, player_idx, dice)
+        if key == self._moves_key:
+            return self._moves
+        player = self.players[player_idx]
+        entry = player.entry_global
+        moves = []
+        for t in player.tokens:
+            code = t.code
+            if code == RING:
+                src = t.ring_rel
+            elif code == BASE:
+                src = -1
+            elif code == HOME:
+                src = RING_LEN + t.home_idx
+            else:
+                continue
+            dst = DEST[src + 1][dice]
+            if dst < 0:
+                continue
+            square = None
+            capture = False
+            if dst < RING_LEN:
+                square = (entry + dst) % RING_LEN
+                if square not in SAFE_GLOBAL_INDICES:
+                    for idx, _ in self._occ.get(square, ()):
+                        if idx != player_idx:
+                            capture = True
+                            break
+            moves.append(Move(player_idx, t, dice, src, dst, square, capture))
+        self._moves_key = key
+        self._moves = tuple(moves)
+        return self._moves
+
+    def make_move(self, move: Move) -> Optional[tuple]:
+        """Execute a Move from legal_moves(); returns an undo record like
+        apply_move (None if the move no longer applies)."""
+        token = move.token
+        if self.dice_value != move.dice or token.progress != move.src \
+                or not token.is_movable_with(move.dice):
+            return None
+        return self._apply(move.player_idx, self.players[move.player_idx], token)
+
+    def play(self, move: Move) -> bool:
+        """make_move() and push it on the undo history, like move_token()."""
+        record = self.make_move(move)
+        if record is None:
+            return False
+        self.history.append(record)
+        if self.journal is not None:
+            self.journal.move(move.player_idx, move.token.id)
+        return True
 
     def move_token(self, player_idx: int, token_id: int) -> bool:
         """Apply current dice_value to the token of player `player_idx` with id token_id.
-           Returns True if moved, False otherwise.
+           Returns True if moved, False otherwise. The move is pushed on the
+           undo history (see undo()).
         """
-        if self.dice_value is None:
+        record = self.apply_move(player_idx, token_id)
+        if record is None:
             return False
+        self.history.append(record)
+        if self.journal is not None:
+            self.journal.move(player_idx, token_id)
+        return True
+
+    def apply_move(self, player_idx: int, token_id: int) -> Optional[tuple]:
+        """Like move_token, but instead of recording history returns an undo
+        record for undo_move() (None if the move is illegal)."""
+        if self.dice_value is None:
+            return None
         player = self.players[player_idx]
-        token = next((t for t in player.tokens if t.id == token_id), None)
+        tokens = player.tokens
+        # Token ids are 1..4 in list order; fall back to a scan for odd saves
+        if 0 < token_id <= len(tokens) and tokens[token_id - 1].id == token_id:
+            token = tokens[token_id - 1]
+        else:
+            token = next((t for t in tokens if t.id == token_id), None)
         if token is None or not token.is_movable_with(self.dice_value):
-            return False
+            return None
+        return self._apply(player_idx, player, token)
 
-        dice = self.dice_value
+    def _apply(self, player_idx: int, player: Player, token: Token) -> tuple:
+        dice = self._dice
+        self._version += 1
+        prev_code, prev_rel, prev_home = token.code, token.ring_rel, token.home_idx
+        if prev_code == RING:
+            src = prev_rel
+            self._index_remove((player.entry_global + prev_rel) % RING_LEN, token)
+        else:
+            src = -1 if prev_code == BASE else RING_LEN + prev_home
 
         # Perform movement
-        if token.state == "base":
-            token.state = "ring"
+        if token.code == BASE:
+            token.code = RING
             token.ring_rel = 0
-        elif token.state == "ring":
+        elif token.code == RING:
             new_rel = token.ring_rel + dice
             if new_rel < RING_LEN:
                 token.ring_rel = new_rel
             else:
                 # enter home
                 steps_into_home = new_rel - (RING_LEN - 1) - 1
-                token.state = "home"
+                token.code = HOME
                 token.ring_rel = -1
                 token.home_idx = steps_into_home
-        elif token.state == "home":
+        elif token.code == HOME:
             token.home_idx += dice
 
         # check finish (exact on last home index)
-        if token.state == "home" and token.home_idx == (HOME_LEN - 1):
-            token.state = "finished"
+        if token.code == HOME and token.home_idx == (HOME_LEN - 1):
+            token.code = FINISHED
             token.home_idx = -1
 
+        zkeys = ZOBRIST_TOKENS[player_idx][(token.id - 1) % TOKENS_PER_PLAYER]
+        self.zobrist ^= zkeys[src + 1] ^ zkeys[DEST[src + 1][dice] + 1]
+
         # handle capture if on ring and not safe
-        self._handle_capture(player_idx, token)
+        captured = ()
+        if token.code == RING:
+            captured = self._handle_capture(player_idx, token)
+            self._index_add((player.entry_global + token.ring_rel) % RING_LEN, player_idx, token)
+        if self.debug_index:
+            self.check_index()
 
+        record = (player_idx, token, prev_code, prev_rel, prev_home, captured,
+                  self._turn, dice, self.awaiting_move)
         extra_turn = (dice == 6)
-        self.dice_value = None
+        self.zobrist ^= ZOBRIST_DICE[dice] ^ ZOBRIST_DICE[0]
+        self._dice = None
         self.awaiting_move = False
 
         if not extra_turn:
             self._advance_turn()
         # else keep same current_turn
 
+        return record
+
+    def apply_pass(self) -> tuple:
+        """Discard the current roll and hand the turn on; returns an undo record."""
+        record = (self.current_turn, None, 0, 0, 0, (),
+                  self.current_turn, self.dice_value, self.awaiting_move)
+        self.dice_value = None
+        self.awaiting_move = False
+        self._advance_turn()
+        return record
+
+    def undo_move(self, record: tuple):
+        """Restore the exact state from before the apply_move/apply_pass that
+        produced `record` (token, captures, turn, dice). Records must be
+        undone in reverse order."""
+        player_idx, token, prev_code, prev_rel, prev_home, captured, \
+            prev_turn, prev_dice, prev_awaiting = record
+        if token is not None:
+            self._version += 1
+            entry = self.players[player_idx].entry_global
+            zkeys = ZOBRIST_TOKENS[player_idx][(token.id - 1) % TOKENS_PER_PLAYER]
+            self.zobrist ^= zkeys[token.progress + 1]
+            if token.code == RING:
+                self._index_remove((entry + token.ring_rel) % RING_LEN, token)
+            token.code, token.ring_rel, token.home_idx = prev_code, prev_rel, prev_home
+            self.zobrist ^= zkeys[token.progress + 1]
+            if prev_code == RING:
+                self._index_add((entry + prev_rel) % RING_LEN, player_idx, token)
+            for idx, t, rel in captured:
+                t.code = RING
+                t.ring_rel = rel
+                zkeys = ZOBRIST_TOKENS[idx][(t.id - 1) % TOKENS_PER_PLAYER]
+                self.zobrist ^= zkeys[0] ^ zkeys[rel + 1]
+                self._index_add((self.players[idx].entry_global + rel) % RING_LEN, idx, t)
+        self.current_turn = prev_turn
+        self.dice_value = prev_dice
+        self.awaiting_move = prev_awaiting
+        if self.debug_index:
+            self.check_index()
+
+    def undo(self) -> bool:
+        """Take back the last move or pass made through move_token/pass_turn.
+        A pass is only made when the roll left no legal move, so undoing it
+        takes back the roll too: the same player is to roll again."""
+        if not self.history:
+            return False
+        record = self.history.pop()
+        self.undo_move(record)
+        if record[1] is None:
+            self.dice_value = None
+            self.awaiting_move = False
+        if self.journal is not None:
+            self.journal.snapshot(self)
         return True
 
-    def _handle_capture(self, mover_idx: int, moved_token: Token):
-        if moved_token.state != "ring":
-            return
+    def _handle_capture(self, mover_idx: int, moved_token: Token) -> tuple:
+        """Send opponents on the mover's (unsafe) square back to base.
+        Returns ((player_idx, token, ring_rel), ...) for undo."""
+        if moved_token.code != RING:
+            return ()
         mover = self.players[mover_idx]
         dest_global = self.global_index_of(mover, moved_token)
         if dest_global in SAFE_GLOBAL_INDICES:
-            return
-        for idx, p in enumerate(self.players):
-            if idx == mover_idx:
-                continue
-            for t in p.tokens:
-                if t.state == "ring" and self.global_index_of(p, t) == dest_global:
-                    # capture
-                    t.state = "base"
-                    t.ring_rel = -1
-                    t.home_idx = -1
+            return ()
+        occ = self._occ.get(dest_global)
+        if occ is None:
+            return ()
+        kept = 0
+        captured = []
+        for entry in occ:
+            if entry[0] == mover_idx:
+                occ[kept] = entry
+                kept += 1
+            else:
+                # capture
+                t = entry[1]
+                captured.append((entry[0], t, t.ring_rel))
+                zkeys = ZOBRIST_TOKENS[entry[0]][(t.id - 1) % TOKENS_PER_PLAYER]
+                self.zobrist ^= zkeys[t.ring_rel + 1] ^ zkeys[0]
+                t.code = BASE
+                t.ring_rel = -1
+                t.home_idx = -1
+        if kept:
+            del occ[kept:]
+        else:
+            del self._occ[dest_global]
+        return tuple(captured)
+
+    def pass_turn(self):
+        """Discard the current roll and hand the turn on (no legal move)."""
+        self.history.append(self.apply_pass())
+        if self.journal is not None:
+            self.journal.pass_()
 
     def _advance_turn(self):
-        self.current_turn = (self.current_turn + 1) % len(self.players)
+        turn = self._turn
+        nxt = (turn + 1) % len(self.players)
+        self.zobrist ^= ZOBRIST_TURN[turn] ^ ZOBRIST_TURN[nxt]
+        self._turn = nxt
 
     def winner_index(self) -> Optional[int]:
         for i, p in enumerate(self.players):
@@ -0,0 +1,307 @@
+# ludo_ai.py
+"""Computer opponents for LudoGame.
+
+ExpectiminimaxBot searches decision nodes (choose a token for the rolled
+dice) and chance nodes (the next roll, six outcomes of 1/6) using make_move /
+undo_move on a private clone of the game. With more than two players the
+search is "paranoid": every other seat minimises the bot's score.
+
+Chance nodes use Star1 pruning (alpha-beta windows pushed through the
+expectation using the evaluation bounds [-1, 1]) and, optionally, Star2
+probing (one move per outcome first, to tighten those bounds). Search is
+iterative deepening with a hard wall-clock budget per move.
+
+Given a ludo_tablebase.Tablebase, positions it covers are answered from
+the table instead of searched.
+
+BotThread runs a bot in a background thread so the pygame loop keeps
+rendering while it thinks.
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from ludo import LudoGame, Move, FINISH_PROGRESS, TOKENS_PER_PLAYER
+
+WIN = 1.0
+LOSS = -1.0
+# Heuristic values are scaled into (-EVAL_SCALE, EVAL_SCALE) so that real
+# wins/losses always dominate.
+EVAL_SCALE = 0.9
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+class _Timeout(Exception):
+    pass
+
+def progress_score(game: LudoGame, seat: int) -> float:
+    """0.0 (all tokens in base) .. 1.0 (all finished)."""
+    total = 0
+    for t in game.players[seat].tokens:
+        total += t.progress + 1
+    return total / (TOKENS_PER_PLAYER * (FINISH_PROGRESS + 1))
+
+def _order_key(move: Move) -> Tuple[int, int, int]:
+    # captures, then finishing, then leaving base, then furthest along
+    return (move.capture, move.dst == FINISH_PROGRESS, move.src == -1, move.dst)
+
+class ExpectiminimaxBot:
+    def __init__(self, time_budget: float = 0.5, max_depth: int = 8, star2: bool = True,
+                 tablebase=None):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.star2 = star2
+        self.tablebase = tablebase
+        # Stats of the last choose_move() call
+        self.nodes = 0
+        self.depth_reached = 0
+        self._tt: Dict[Tuple[int, int], Tuple[int, float, int]] = {}
+
+    # ----------------- Public API -----------------
+    def choose_move(self, game: LudoGame) -> Optional[Move]:
+        """Pick a move for the current player of `game`, whose dice must
+        already be rolled. Returns one of game.legal_moves(...) or None."""
+        if game.dice_value is None:
+            return None
+        moves = game.legal_moves(game.current_turn, game.dice_value)
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+        if self.tablebase is not None:
+            move = self.tablebase.best_move(game)
+            if move is not None:
+                return move
+        tid = self.search(game.clone())
+        for m in moves:
+            if m.token_id == tid:
+                return m
+        return moves[0]
+
+    def search(self, g: LudoGame) -> Optional[int]:
+        """Iterative-deepening search on `g` (mutated and restored). Returns
+        the token id of the best move found within the time budget."""
+        self.g = g
+        self.root_seat = g.current_turn
+        self.deadline = time.perf_counter() + self.time_budget
+        self.nodes = 0
+        self.depth_reached = 0
+        self._tt.clear()
+        moves = sorted(g.legal_moves(g.current_turn, g.dice_value), key=_order_key, reverse=True)
+        best = moves[0].token_id if moves else None
+        for depth in range(1, self.max_depth + 1):
+            try:
+                tid, _ = self._root(moves, depth)
+            except _Timeout:
+                break
+            best = tid
+            self.depth_reached = depth
+            # search the previous best first next iteration
+            moves.sort(key=lambda m: m.token_id != best)
+        return best
+
+    # ----------------- Search -----------------
+    def _root(self, moves, depth):
+        g = self.g
+        alpha, best_tid = LOSS - 1, moves[0].token_id
+        for m in moves:
+            record = g.make_move(m)
+            try:
+                if g.players[m.player_idx].all_finished():
+                    v = WIN
+                else:
+                    v = self._chance(depth - 1, max(alpha, LOSS), WIN)
+            finally:
+                g.undo_move(record)
+            if v > alpha:
+                alpha, best_tid = v, m.token_id
+        return best_tid, alpha
+
+    def _tick(self):
+        self.nodes += 1
+        if not self.nodes & 1023 and time.perf_counter() > self.deadline:
+            raise _Timeout()
+
+    def _evaluate(self) -> float:
+        g = self.g
+        mine = progress_score(g, self.root_seat)
+        best_other = 0.0
+        for seat in range(len(g.players)):
+            if seat != self.root_seat:
+                s = progress_score(g, seat)
+                if s > best_other:
+                    best_other = s
+        return EVAL_SCALE * (mine - best_other)
+
+    def _decision(self, depth: int, alpha: float, beta: float) -> float:
+        """Current player chooses a move for the pending dice (fail-hard)."""
+        self._tick()
+        g = self.g
+        seat = g.current_turn
+        moves = g.legal_moves(seat, g.dice_value)
+        if not moves:
+            record = g.apply_pass()
+            try:
+                return self._chance(depth - 1, alpha, beta)
+            finally:
+                g.undo_move(record)
+        maximizing = seat == self.root_seat
+        for m in sorted(moves, key=_order_key, reverse=True):
+            record = g.make_move(m)
+            try:
+                if g.players[seat].all_finished():
+                    v = WIN if maximizing else LOSS
+                else:
+                    v = self._chance(depth - 1, alpha, beta)
+            finally:
+                g.undo_move(record)
+            if maximizing:
+                if v >= beta:
+                    return beta
+                if v > alpha:
+                    alpha = v
+            else:
+                if v <= alpha:
+                    return alpha
+                if v < beta:
+                    beta = v
+        return alpha if maximizing else beta
+
+    def _probe(self, depth: int) -> float:
+        """Star2 probe: value of the best-ordered move only. A lower bound
+        at a max node, an upper bound at a min node."""
+        g = self.g
+        seat = g.current_turn
+        moves = g.legal_moves(seat, g.dice_value)
+        if not moves:
+            return self._decision(depth, LOSS, WIN)
+        m = max(moves, key=_order_key)
+        record = g.make_move(m)
+        try:
+            if g.players[seat].all_finished():
+                return WIN if seat == self.root_seat else LOSS
+            return self._chance(depth - 1, LOSS, WIN)
+        finally:
+            g.undo_move(record)
+
+    def _chance(self, depth: int, alpha: float, beta: float) -> float:
+        """Expected value over the next roll, with Star1/Star2 pruning."""
+        g = self.g
+        if depth <= 0:
+            return self._evaluate()
+        key = (g.zobrist, depth)
+        hit = self._tt.get(key)
+        if hit is not None:
+            _, v, flag = hit
+            if flag == EXACT:
+                return v
+            if flag == LOWER and v >= beta:
+                return beta
+            if flag == UPPER and v <= alpha:
+                return alpha
+        self._tick()
+
+        lower = [LOSS] * 6
+        upper = [WIN] * 6
+        if self.star2:
+            maximizing = g.current_turn == self.root_seat
+            for i in range(6):
+                g.dice_value = i + 1
+                g.awaiting_move = True
+                w = self._probe(depth)
+                if maximizing:
+                    lower[i] = w
+                else:
+                    upper[i] = w
+            g.dice_value = None
+            g.awaiting_move = False
+            if maximizing and sum(lower) / 6 >= beta:
+                self._store(key, depth, beta, LOWER)
+                return beta
+            if not maximizing and sum(upper) / 6 <= alpha:
+                self._store(key, depth, alpha, UPPER)
+                return alpha
+
+        acc = 0.0
+        lo_rest = sum(lower) / 6
+        hi_rest = sum(upper) / 6
+        try:
+            for i in range(6):
+                lo_rest -= lower[i] / 6
+                hi_rest -= upper[i] / 6
+                a_i = (alpha - acc - hi_rest) * 6
+                b_i = (beta - acc - lo_rest) * 6
+                g.dice_value = i + 1
+                g.awaiting_move = True
+                v = self._decision(depth, max(a_i, lower[i]), min(b_i, upper[i]))
+                if v <= a_i:
+                    self._store(key, depth, alpha, UPPER)
+                    return alpha
+                if v >= b_i:
+                    self._store(key, depth, beta, LOWER)
+                    return beta
+                acc += v / 6
+        finally:
+            g.dice_value = None
+            g.awaiting_move = False
+        self._store(key, depth, acc, EXACT)
+        return acc
+
+    def _store(self, key, depth, value, flag):
+        self._tt[key] = (depth, value, flag)
+
+# ----------------- Background thinking -----------------
+SEARCH_FAILED = -1          # BotThread.poll(): the search raised, see BotThread.error
+
+class BotThread:
+    """Runs bot.choose_move on a clone of the game in a daemon thread.
+
+    start(game) snapshots the position; poll() returns None while thinking
+    and then the chosen token id (0 when the bot has no move, SEARCH_FAILED
+    with the exception in `error` if the search raised). The clone means
+    the UI may keep drawing/reading the real game meanwhile. `on_done`, if
+    given, is called from the worker thread when the search finishes or
+    fails (main.py uses it to post a wake-up event).
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._thread: Optional[threading.Thread] = None
+        self._result: Optional[int] = None
+        self._key: Optional[int] = None
+        self._done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+    @property
+    def busy(self) -> bool:
+        return self._thread is not None
+
+    def start(self, game: LudoGame, on_done=None):
+        snapshot = game.clone()
+        self._key = game.zobrist
+        self._result = None
+        self.error = None
+        done = self._done = threading.Event()
+
+        def run():
+            try:
+                move = self.bot.choose_move(snapshot)
+                self._result = move.token_id if move is not None else 0
+            except Exception as e:
+                self.error = e
+                self._result = SEARCH_FAILED
+            finally:
+                done.set()
+                if on_done is not None:
+                    on_done()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def poll(self, game: LudoGame) -> Optional[int]:
+        """Token id to play once the search is done. Results for a position
+        other than `game`'s current one (e.g. after Undo/Load) are dropped."""
+        if self._thread is None or not self._done.is_set():
+            return None
+        self._thread = None
+        if game.zobrist != self._key:
+            return None
+        return self._result
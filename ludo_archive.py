@@ -0,0 +1,209 @@
+# ludo_archive.py
+"""Replay archives: many games' event streams (see ludo_replay) packed
+into one file with an offset index, read through mmap.
+
+    header   "LUDOARC\\x01", u64 game count, u64 index offset
+    games    each game's events, START .. END, back to back
+    index    per game: u64 offset, u32 length, u32 plies, u8 players,
+             u8 winner (0xff: none)
+
+Opening an archive maps the file and reads only the header. archive[i]
+reads one index entry, and the game's bytes are touched only when its
+events or positions are asked for, so a job that looks at a few games of
+millions reads a few pages. The map is read-only and shared: analysis
+processes opening the same archive share one copy in the page cache.
+
+    python -m ludo_sim --games 1000000 --seed 1 --log games.lra
+    python -m ludo_archive pack games.lra a.lrl b.lrl
+    python -m ludo_archive show games.lra 123456 --ply 80
+"""
+import argparse
+import mmap
+import os
+import struct
+from typing import Iterator, List, Optional
+
+from ludo import LudoGame
+from ludo_replay import NO_WINNER, ReplayLog, events, replay_to, scan
+
+ARCHIVE_SUFFIX = ".lra"
+ARCHIVE_MAGIC = b"LUDOARC\x01"
+
+_HEADER = struct.Struct("<8sQQ")
+_ENTRY = struct.Struct("<QIIBB")
+_ITER_BLOCK = 4096                  # index entries read per slice while iterating
+
+class ArchivedGame:
+    """One game of an Archive. Its events are read from the map on first
+    use."""
+    __slots__ = ("_archive", "index", "offset", "length", "plies", "players", "winner",
+                 "_data", "_index")
+
+    def __init__(self, archive: "Archive", i: int, offset: int, length: int, plies: int,
+                 players: int, winner: int):
+        self._archive = archive
+        self.index = i
+        self.offset = offset
+        self.length = length
+        self.plies = plies
+        self.players = players
+        self.winner = None if winner == NO_WINNER else winner
+        self._data = None
+        self._index = None
+
+    @property
+    def data(self) -> bytes:
+        if self._data is None:
+            self._data = self._archive._mm[self.offset:self.offset + self.length]
+        return self._data
+
+    @property
+    def seed(self) -> Optional[int]:
+        return self._game_index().seed
+
+    def events(self) -> Iterator[tuple]:
+        return events(self.data, 0, self.length)
+
+    def position(self, ply: Optional[int] = None, verify: bool = False) -> LudoGame:
+        """Position after `ply` plies (None: the end), from the nearest keyframe."""
+        return replay_to(self.data, self._game_index(), ply, verify)
+
+    def _game_index(self):
+        if self._index is None:
+            self._index = next(scan(self.data))
+        return self._index
+
+class Archive:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:                  # empty file
+                raise ValueError(f"{path}: not a Ludo replay archive") from None
+        try:
+            magic, self._count, self._index_at = _HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            magic = None
+        if magic != ARCHIVE_MAGIC or \
+                self._index_at + self._count * _ENTRY.size > len(self._mm):
+            self._mm.close()
+            raise ValueError(f"{path}: not a Ludo replay archive")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("archive index out of range")
+        return ArchivedGame(self, i, *_ENTRY.unpack_from(self._mm, self._index_at + i * _ENTRY.size))
+
+    def __iter__(self) -> Iterator[ArchivedGame]:
+        mm, at, i = self._mm, self._index_at, 0
+        while i < self._count:                  # the index, a block at a time
+            n = min(_ITER_BLOCK, self._count - i)
+            for entry in _ENTRY.iter_unpack(mm[at:at + n * _ENTRY.size]):
+                yield ArchivedGame(self, i, *entry)
+                i += 1
+            at += n * _ENTRY.size
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ArchiveWriter:
+    """Builds an archive at `path` (written to path + ".tmp" and renamed
+    into place by close()).
+
+    write() takes whole games of events, so a ReplayWriter can write
+    straight into an archive: ReplayWriter(ArchiveWriter(path), write_header=False).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp = path + ".tmp"
+        self._f = open(self._tmp, "wb")
+        self._f.write(_HEADER.pack(ARCHIVE_MAGIC, 0, 0))
+        self._at = _HEADER.size
+        self._entries = bytearray()
+        self.games = 0
+
+    def write(self, data: bytes) -> int:
+        """Append one or more complete games (START .. END events)."""
+        for g in scan(data):
+            self._entries += _ENTRY.pack(self._at + g.start, g.end - g.start, g.plies,
+                                         g.players, NO_WINNER if g.winner is None else g.winner)
+            self.games += 1
+        self._f.write(data)
+        self._at += len(data)
+        return len(data)
+
+    def add_log(self, log: ReplayLog):
+        for g in log.index:
+            self.write(log.data[g.start:g.end])
+
+    def close(self):
+        if self._f is None:
+            return
+        f = self._f
+        f.write(self._entries)
+        f.seek(0)
+        f.write(_HEADER.pack(ARCHIVE_MAGIC, self.games, self._at))
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        self._f = None
+        os.replace(self._tmp, self.path)
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._f.close()
+            self._f = None
+            os.remove(self._tmp)
+
+def pack(out: str, logs: List[str]) -> int:
+    """Pack replay logs into a new archive; returns the number of games."""
+    with ArchiveWriter(out) as w:
+        for path in logs:
+            w.add_log(ReplayLog.open(path))
+    return w.games
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Ludo replay archives")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="pack replay logs into an archive")
+    p.add_argument("archive")
+    p.add_argument("logs", nargs="+")
+    p = sub.add_parser("show", help="print one game's position")
+    p.add_argument("archive")
+    p.add_argument("game", type=int)
+    p.add_argument("--ply", type=int, default=None, help="default: end of the game")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "pack":
+        print(f"{pack(args.archive, args.logs)} games -> {args.archive}")
+        return
+    with Archive(args.archive) as archive:
+        g = archive[args.game]
+        who = "nobody" if g.winner is None else f"seat {g.winner}"
+        print(f"{len(archive)} games; game {g.index}: {g.players} players, seed {g.seed}, "
+              f"{g.plies} plies, {who} wins")
+        for p in g.position(args.ply, verify=True).players:
+            print(f"  {p.name:<7}", " ".join(f"{t.progress:>3}" for t in p.tokens))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+# ludo_mcts.py
+"""Monte Carlo Tree Search player for LudoGame.
+
+The tree alternates decision nodes (a seat picks a token for a known dice
+value) and chance nodes (the next roll, sampled). Selection is UCT on each
+decision node using the reward of the seat to move (max^n), so it handles
+2-4 players without the paranoid assumption of ludo_ai.
+
+Playouts are "random" or "heuristic" (capture > finish > leave base >
+random) and are truncated after `playout_plies`, scoring the position by
+track progress. Moves are applied with make_move/undo_move, so an
+iteration costs no copying.
+
+With workers > 1 the search is root-parallel: every worker process grows
+its own tree from the same position with a different seed and the root
+visit counts are summed. With workers == 1 the subtree under the actual
+continuation is kept between moves. Positions covered by an optional
+ludo_tablebase.Tablebase are played from the table without searching.
+"""
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from ludo import LudoGame, Move, FINISH_PROGRESS
+from ludo_ai import progress_score
+
+class _Decision:
+    __slots__ = ("key", "seat", "nmoves", "children", "n", "w", "visits")
+
+    def __init__(self, key: int, seat: int, nmoves: int):
+        self.key = key                  # zobrist (includes the dice)
+        self.seat = seat
+        self.nmoves = nmoves            # 0 means forced pass
+        width = max(1, nmoves)
+        self.children: List[Optional[_Chance]] = [None] * width
+        self.n = [0] * width
+        self.w = [0.0] * width
+        self.visits = 0
+
+class _Chance:
+    __slots__ = ("children", "winner")
+
+    def __init__(self, winner: Optional[int] = None):
+        self.children: Dict[int, _Decision] = {}
+        self.winner = winner            # set when the move leading here won
+
+def pick_heuristic(rng, moves) -> Move:
+    """Playout policy: a capture, else finishing or leaving base, else random."""
+    best = None
+    for m in moves:
+        if m.capture:
+            return m
+        if m.dst == FINISH_PROGRESS or (best is None and m.src == -1):
+            best = m
+    return best if best is not None else moves[rng.randrange(len(moves))]
+
+class MCTSBot:
+    def __init__(self, time_budget: float = 1.0, iterations: Optional[int] = None,
+                 workers: int = 1, playout: str = "heuristic", playout_plies: int = 200,
+                 exploration: float = 1.0, seed: Optional[int] = None, tablebase=None):
+        if playout not in ("random", "heuristic"):
+            raise ValueError(f"unknown playout policy {playout!r}")
+        self.time_budget = time_budget
+        self.iterations = iterations
+        self.workers = workers
+        self.playout = playout
+        self.playout_plies = playout_plies
+        self.exploration = exploration
+        self.tablebase = tablebase          # ludo_tablebase.Tablebase: exact endgames
+        self.rng = random.Random(seed)
+        self._root: Optional[_Decision] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Stats of the last choose_move() call
+        self.playouts = 0
+        self.elapsed = 0.0
+
+    @property
+    def playouts_per_sec(self) -> float:
+        return self.playouts / self.elapsed if self.elapsed > 0 else 0.0
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    # ----------------- Public API -----------------
+    def choose_move(self, game: LudoGame) -> Optional[Move]:
+        """Pick a move for the current player of `game` (dice already rolled).
+        `playouts` and `elapsed` describe this call (0 if it did not search)."""
+        self.playouts = 0
+        self.elapsed = 0.0
+        if game.dice_value is None:
+            return None
+        moves = game.legal_moves(game.current_turn, game.dice_value)
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+        if self.tablebase is not None:
+            move = self.tablebase.best_move(game)
+            if move is not None:
+                return move
+        start = time.perf_counter()
+        if self.workers > 1:
+            visits = self._search_parallel(game)
+        else:
+            visits = self._search_local(game.clone())
+        self.elapsed = time.perf_counter() - start
+        best = max(visits, key=visits.get)
+        for m in moves:
+            if m.token_id == best:
+                return m
+        return moves[0]
+
+    def _search_local(self, g: LudoGame) -> Dict[int, int]:
+        root = self._reuse_root(g)
+        self.playouts = run_search(g, root, self.rng, self.time_budget, self.iterations,
+                                   self.playout, self.playout_plies, self.exploration)
+        self._root = root
+        moves = g.legal_moves(g.current_turn, g.dice_value)
+        return {moves[i].token_id: root.n[i] for i in range(root.nmoves)}
+
+    def _search_parallel(self, game: LudoGame) -> Dict[int, int]:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        state = game.to_dict()
+        jobs = [(state, self.rng.getrandbits(63), self.time_budget, self.iterations,
+                 self.playout, self.playout_plies, self.exploration)
+                for _ in range(self.workers)]
+        visits: Dict[int, int] = {}
+        self.playouts = 0
+        for counts, playouts in self._pool.map(_worker_search, jobs):
+            self.playouts += playouts
+            for tid, n in counts.items():
+                visits[tid] = visits.get(tid, 0) + n
+        return visits
+
+    def _reuse_root(self, g: LudoGame, max_nodes: int = 20_000) -> _Decision:
+        """Find the node for g's position under the previous root (breadth
+        first over the continuation actually played), else a fresh root."""
+        key = g.zobrist
+        old = self._root
+        if old is not None:
+            frontier = [old]
+            seen = 0
+            while frontier and seen < max_nodes:
+                nxt = []
+                for node in frontier:
+                    seen += 1
+                    if node.key == key and node.seat == g.current_turn:
+                        return node
+                    for ch in node.children:
+                        if ch is not None:
+                            nxt.extend(ch.children.values())
+                frontier = nxt
+        moves = g.legal_moves(g.current_turn, g.dice_value)
+        return _Decision(key, g.current_turn, len(moves))
+
+def _worker_search(args) -> Tuple[Dict[int, int], int]:
+    state, seed, budget, iterations, playout, plies, exploration = args
+    g = LudoGame.from_dict(state)
+    root = _Decision(g.zobrist, g.current_turn, len(g.legal_moves(g.current_turn, g.dice_value)))
+    playouts = run_search(g, root, random.Random(seed), budget, iterations, playout, plies,
+                          exploration)
+    moves = g.legal_moves(g.current_turn, g.dice_value)
+    return {moves[i].token_id: root.n[i] for i in range(root.nmoves)}, playouts
+
+# ----------------- Search core -----------------
+def run_search(g: LudoGame, root: _Decision, rng: random.Random, budget: float,
+               iterations: Optional[int], playout: str, plies: int, c: float) -> int:
+    """Grow `root` (the node for g's current position) until the time budget
+    or iteration count runs out. Returns the number of playouts."""
+    deadline = time.perf_counter() + budget
+    heuristic = playout == "heuristic"
+    root_dice = g.dice_value
+    nplayers = len(g.players)
+    done = 0
+    records = []
+    path: List[Tuple[_Decision, int]] = []
+    while True:
+        if iterations is not None:
+            if done >= iterations:
+                break
+        elif not done & 15 and time.perf_counter() > deadline:
+            break
+        node = root
+        reward = None
+        while True:
+            # Decision node: choose among the pending dice's legal moves
+            seat = node.seat
+            if node.nmoves == 0:
+                idx = 0
+                records.append(g.apply_pass())
+                winner = None
+            else:
+                idx = _select(node, c)
+                moves = g.legal_moves(seat, g.dice_value)
+                records.append(g.make_move(moves[idx]))
+                winner = seat if g.players[seat].all_finished() else None
+            path.append((node, idx))
+            child = node.children[idx]
+            if child is None:
+                child = node.children[idx] = _Chance(winner)
+                if winner is None:
+                    reward = _playout(g, rng, heuristic, plies, records, nplayers)
+                    break
+            if child.winner is not None:
+                reward = _win(child.winner, nplayers)
+                break
+            # Chance node: sample the next roll
+            dice = rng.randint(1, 6)
+            g.dice_value = dice
+            g.awaiting_move = True
+            nxt = child.children.get(dice)
+            if nxt is None:
+                turn = g.current_turn
+                child.children[dice] = _Decision(g.zobrist, turn,
+                                                 len(g.legal_moves(turn, dice)))
+                reward = _playout(g, rng, heuristic, plies, records, nplayers)
+                break
+            node = nxt
+
+        for dn, idx in path:
+            dn.visits += 1
+            dn.n[idx] += 1
+            dn.w[idx] += reward[dn.seat]
+        path.clear()
+        while records:
+            g.undo_move(records.pop())
+        g.dice_value = root_dice
+        g.awaiting_move = True
+        done += 1
+    return done
+
+def _select(node: _Decision, c: float) -> int:
+    n, w = node.n, node.w
+    log_n = math.log(node.visits + 1)
+    best, best_val = 0, -1.0
+    for i in range(node.nmoves):
+        if n[i] == 0:
+            return i
+        val = w[i] / n[i] + c * math.sqrt(log_n / n[i])
+        if val > best_val:
+            best, best_val = i, val
+    return best
+
+def _win(seat: int, nplayers: int) -> List[float]:
+    r = [0.0] * nplayers
+    r[seat] = 1.0
+    return r
+
+def _playout(g: LudoGame, rng, heuristic: bool, plies: int, records, nplayers) -> List[float]:
+    """Play on from g's position (records appended for undo). Returns a
+    reward per seat: 1/0 for a finished game, else progress shares."""
+    for _ in range(plies):
+        seat = g.current_turn
+        if g.dice_value is None:
+            g.dice_value = rng.randint(1, 6)
+            g.awaiting_move = True
+        moves = g.legal_moves(seat, g.dice_value)
+        if not moves:
+            records.append(g.apply_pass())
+            continue
+        m = pick_heuristic(rng, moves) if heuristic else moves[rng.randrange(len(moves))]
+        records.append(g.make_move(m))
+        if g.players[seat].all_finished():
+            return _win(seat, nplayers)
+    scores = [progress_score(g, s) for s in range(nplayers)]
+    total = sum(scores)
+    if total == 0:
+        return [1.0 / nplayers] * nplayers
+    return [s / total for s in scores]
+
+def main(argv=None):
+    """Pit MCTSBot against random movers and report playouts/sec."""
+    import argparse
+    ap = argparse.ArgumentParser(description="MCTS bot self-play benchmark")
+    ap.add_argument("--games", type=int, default=4)
+    ap.add_argument("--players", type=int, default=4, choices=(2, 3, 4))
+    ap.add_argument("--think", type=float, default=0.2)
+    ap.add_argument("--workers", type=int, default=1, help="0 = one per CPU")
+    ap.add_argument("--playout", default="heuristic", choices=("random", "heuristic"))
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    bot = MCTSBot(time_budget=args.think, workers=args.workers or os.cpu_count() or 1,
+                  playout=args.playout, seed=args.seed)
+    rng = random.Random(args.seed)
+    wins = 0
+    rates = []
+    try:
+        for i in range(args.games):
+            g = LudoGame(args.players, rng=random.Random(args.seed * 1000 + i))
+            while g.winner_index() is None:
+                moves = g.legal_moves(g.current_turn, g.roll_dice())
+                if not moves:
+                    g.pass_turn()
+                    continue
+                if g.current_turn == 0:
+                    g.play(bot.choose_move(g))
+                    if bot.playouts:
+                        rates.append(bot.playouts_per_sec)
+                else:
+                    g.play(rng.choice(moves))
+            wins += g.winner_index() == 0
+            print(f"game {i}: {g.players[g.winner_index()].name} wins")
+    finally:
+        bot.close()
+    print(f"MCTS seat won {wins}/{args.games}; "
+          f"mean playouts/sec {sum(rates) / max(1, len(rates)):,.0f}")
+
+if __name__ == "__main__":
+    main()
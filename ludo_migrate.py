@@ -0,0 +1,116 @@
+# ludo_migrate.py
+"""Bulk conversion of old JSON saves to the current format.
+
+Walks the given files and directories, upgrades every *.json save whose
+schema is older than ludo.JSON_SCHEMA (see ludo.upgrade_save) and writes
+it atomically, either next to the original (--in-place) or under --out
+with the same relative path. Files are converted by a process pool; paths
+are fed to it lazily with a bounded number in flight, so a directory of
+millions of saves is never listed or held in memory at once.
+
+Each file is reported as it finishes (failures always, the rest with
+--verbose), followed by a summary; the exit status is 1 if any failed.
+
+    python -m ludo_migrate old_saves/ --out converted/ --workers 8
+    python -m ludo_migrate old_saves/ --in-place --binary   # also to *.ludo
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, Optional, Tuple
+
+from ludo import BINARY_SUFFIX, JSON_SCHEMA, LudoGame, atomic_write, json_schema
+
+# Outcomes of convert_file()
+UPGRADED = "upgraded"
+CURRENT = "current"         # already in the current schema; written only with --binary
+FAILED = "failed"
+
+def iter_saves(paths, suffix: str = ".json") -> Iterator[Tuple[str, str]]:
+    """(path, path relative to its root argument) of every save under
+    `paths`, walked lazily with os.scandir."""
+    for root in paths:
+        if not os.path.isdir(root):
+            yield root, os.path.basename(root)
+            continue
+        stack = [root]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(suffix):
+                        yield entry.path, os.path.relpath(entry.path, root)
+
+def convert_file(src: str, dst: str, binary: bool = False) -> Tuple[str, str, str]:
+    """Upgrade one save. Returns (src, outcome, detail)."""
+    try:
+        with open(src, "rb") as f:
+            data = json.loads(f.read())
+        schema = json_schema(data)
+        if schema == JSON_SCHEMA and not binary and src == dst:
+            return src, CURRENT, ""
+        game = LudoGame(2)
+        game.set_state(data)
+        if binary:
+            dst = os.path.splitext(dst)[0] + BINARY_SUFFIX
+        if os.path.dirname(dst):
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+        atomic_write(dst, game.save_data(dst))
+        return src, UPGRADED if schema < JSON_SCHEMA else CURRENT, dst
+    except Exception as e:                  # one bad file must not stop the run
+        return src, FAILED, f"{type(e).__name__}: {e}"
+
+def _convert(job) -> Tuple[str, str, str]:
+    return convert_file(*job)
+
+def migrate(paths, out: Optional[str] = None, binary: bool = False, workers: int = 1,
+            in_flight: int = 4) -> Iterator[Tuple[str, str, str]]:
+    """Convert every save under `paths`, yielding (src, outcome, detail)
+    per file as it completes. With `out` None files are rewritten in place."""
+    jobs = ((src, src if out is None else os.path.join(out, rel), binary)
+            for src, rel in iter_saves(paths))
+    if workers == 1:
+        for job in jobs:
+            yield convert_file(*job)
+        return
+    limit = workers * in_flight
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        pending = set()
+        for job in jobs:
+            pending.add(ex.submit(_convert, job))
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield fut.result()
+        for fut in pending:
+            yield fut.result()
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Upgrade old Ludo JSON saves")
+    ap.add_argument("paths", nargs="+", help="save files or directories")
+    dest = ap.add_mutually_exclusive_group(required=True)
+    dest.add_argument("--out", help="directory for the converted saves")
+    dest.add_argument("--in-place", action="store_true", help="rewrite the saves themselves")
+    ap.add_argument("--binary", action="store_true",
+                    help=f"write {BINARY_SUFFIX} saves instead of JSON")
+    ap.add_argument("--workers", type=int, default=0, help="processes (0 = one per CPU)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="report every file")
+    args = ap.parse_args(argv)
+
+    counts = {UPGRADED: 0, CURRENT: 0, FAILED: 0}
+    for src, outcome, detail in migrate(args.paths, args.out, args.binary,
+                                        args.workers or os.cpu_count() or 1):
+        counts[outcome] += 1
+        if outcome == FAILED:
+            print(f"FAILED {src}: {detail}", file=sys.stderr)
+        elif args.verbose:
+            print(f"{outcome} {src}" + (f" -> {detail}" if detail else ""))
+    print(f"{counts[UPGRADED]} upgraded, {counts[CURRENT]} already current, "
+          f"{counts[FAILED]} failed")
+    return 1 if counts[FAILED] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+# ludo_replay.py
+"""Append-only replay logs and a replay engine with keyframes.
+
+A log is a byte stream of games, each a run of one-byte events (a few
+with a payload):
+
+    START      0x01  players, seed flag, [u64 seed]
+    KEYFRAME   0x03  u32 ply, u16 length, LudoGame.to_bytes() state
+    ROLL       0x08 + dice - 1                      (0x08..0x0d)
+    MOVE       0x10 | player << 2 | token id - 1    (0x10..0x1f)
+    CAPTURE    0x20 | player << 2 | token id - 1    victims of the move before
+    WIDE_MOVE  0x04  player, token id               (ids outside 1..4)
+    PASS       0x00
+    END        0x02  winner (0xff: none)
+
+A ply is one roll and what followed it (a move or a pass). Every game
+starts with a keyframe at ply 0 and gets another after every
+`keyframe_every` plies, so position(game, ply) restores the nearest
+keyframe at or before `ply` and replays at most keyframe_every - 1 plies
+through LudoGame.
+
+ReplayWriter can be fed explicitly (ludo_sim does this) or attached to a
+LudoGame with attach(), in which case it sees every roll, move and pass
+made through the history-recording API. A structural change (undo, load,
+adding a player) is logged as a keyframe; plies keep counting forward.
+
+    python -m ludo_sim --games 10000 --seed 1 --log games.lrl
+    python -m ludo_replay games.lrl --game 1234 --ply 200
+"""
+import argparse
+import struct
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from ludo import LudoGame
+
+LOG_MAGIC = b"LUDOLOG\x01"
+
+EV_PASS = 0x00
+EV_START = 0x01
+EV_END = 0x02
+EV_KEYFRAME = 0x03
+EV_WIDE_MOVE = 0x04
+EV_ROLL = 0x08
+EV_MOVE = 0x10
+EV_CAPTURE = 0x20
+NO_WINNER = 0xFF
+
+_SEED = struct.Struct("<Q")
+_KEYFRAME = struct.Struct("<IH")
+
+DEFAULT_KEYFRAME_EVERY = 64
+
+class ReplayWriter:
+    """Writes games to binary stream `f`. Events are buffered and written
+    at end_game() or flush()."""
+
+    def __init__(self, f: BinaryIO, keyframe_every: int = DEFAULT_KEYFRAME_EVERY,
+                 write_header: bool = True):
+        self.f = f
+        self.keyframe_every = keyframe_every
+        self.games = 0
+        self._buf = bytearray()
+        self._game: Optional[LudoGame] = None
+        self._ply = 0
+        if write_header:
+            f.write(LOG_MAGIC)
+
+    # ----------------- Explicit API -----------------
+    def start_game(self, game: LudoGame, seed: Optional[int] = None):
+        self._game = game
+        self._ply = 0
+        buf = self._buf
+        buf += bytes((EV_START, len(game.players), seed is not None))
+        if seed is not None:
+            buf += _SEED.pack(seed)
+        self._keyframe()
+
+    def roll(self, dice: int):
+        self._ply += 1
+        self._buf.append(EV_ROLL + dice - 1)
+
+    def move(self, player_idx: int, token_id: int, captured: tuple = ()):
+        """Log a move; `captured` is the undo record's ((player, token,
+        ring_rel), ...) of tokens it sent home."""
+        buf = self._buf
+        if 0 < token_id <= 4:
+            buf.append(EV_MOVE | player_idx << 2 | (token_id - 1))
+        else:
+            buf += bytes((EV_WIDE_MOVE, player_idx, token_id))
+        for idx, t, _ in captured:
+            buf.append(EV_CAPTURE | idx << 2 | ((t.id - 1) & 3))
+        if self._ply % self.keyframe_every == 0:
+            self._keyframe()
+
+    def pass_(self):
+        self._buf.append(EV_PASS)
+        if self._ply % self.keyframe_every == 0:
+            self._keyframe()
+
+    def end_game(self, winner: Optional[int]):
+        self._buf += bytes((EV_END, NO_WINNER if winner is None else winner))
+        hooks = self._game.journal if self._game is not None else None
+        if isinstance(hooks, _GameHooks) and hooks.w is self:
+            self._game.journal = None
+        self._game = None
+        self.games += 1
+        self.flush()
+
+    def flush(self):
+        self.f.write(self._buf)
+        self._buf.clear()
+
+    def _keyframe(self):
+        state = self._game.to_bytes()
+        self._buf.append(EV_KEYFRAME)
+        self._buf += _KEYFRAME.pack(self._ply, len(state)) + state
+
+    def attach(self, game: LudoGame, seed: Optional[int] = None):
+        """Start a game and log it through `game`'s journal hooks until
+        end_game(). Replaces any journal already attached."""
+        self.start_game(game, seed)
+        game.journal = _GameHooks(self)
+
+class _GameHooks:
+    """LudoGame journal hooks feeding a ReplayWriter. The move hook runs
+    right after the undo record is pushed, so captures are read from it."""
+
+    def __init__(self, writer: ReplayWriter):
+        self.w = writer
+
+    def roll(self, dice: int):
+        self.w.roll(dice)
+
+    def move(self, player_idx: int, token_id: int):
+        game = self.w._game
+        self.w.move(player_idx, token_id, game.history[-1][5] if game.history else ())
+
+    def pass_(self):
+        self.w.pass_()
+
+    def snapshot(self, game: LudoGame):
+        self.w._keyframe()
+
+# ----------------- Reading -----------------
+class GameIndex:
+    """Where one game lives in a log: its START offset, END offset (just
+    past the END event) and [(ply, keyframe offset), ...]."""
+    __slots__ = ("start", "end", "players", "seed", "winner", "plies", "keyframes")
+
+    def __init__(self, start: int):
+        self.start = start
+        self.end = start
+        self.players = 0
+        self.seed: Optional[int] = None
+        self.winner: Optional[int] = None
+        self.plies = 0
+        self.keyframes: List[Tuple[int, int]] = []
+
+def scan(data, pos: int = 0) -> Iterator[GameIndex]:
+    """Index the games in `data` (bytes/memoryview/mmap of events)
+    starting at `pos`, without replaying them."""
+    n = len(data)
+    game = None
+    while pos < n:
+        op = data[pos]
+        if op >= EV_ROLL:
+            if op < EV_MOVE:
+                game.plies += 1
+            pos += 1
+        elif op == EV_PASS:
+            pos += 1
+        elif op == EV_START:
+            game = GameIndex(pos)
+            game.players = data[pos + 1]
+            if data[pos + 2]:
+                game.seed, = _SEED.unpack_from(data, pos + 3)
+                pos += 3 + _SEED.size
+            else:
+                pos += 3
+        elif op == EV_KEYFRAME:
+            ply, length = _KEYFRAME.unpack_from(data, pos + 1)
+            game.keyframes.append((ply, pos))
+            pos += 1 + _KEYFRAME.size + length
+        elif op == EV_WIDE_MOVE:
+            pos += 3
+        elif op == EV_END:
+            w = data[pos + 1]
+            game.winner = None if w == NO_WINNER else w
+            pos += 2
+            game.end = pos
+            yield game
+            game = None
+        else:
+            raise ValueError(f"bad replay event {op:#x} at offset {pos}")
+
+def events(data, pos: int, end: int) -> Iterator[tuple]:
+    """Decode the events in data[pos:end] as tuples:
+    ("start", players, seed), ("keyframe", ply, state bytes), ("roll", dice),
+    ("move", player, token id), ("capture", player, token id), ("pass",),
+    ("end", winner)."""
+    while pos < end:
+        op = data[pos]
+        if op >= EV_CAPTURE:
+            yield ("capture", (op >> 2) & 3, (op & 3) + 1)
+            pos += 1
+        elif op >= EV_MOVE:
+            yield ("move", (op >> 2) & 3, (op & 3) + 1)
+            pos += 1
+        elif op >= EV_ROLL:
+            yield ("roll", op - EV_ROLL + 1)
+            pos += 1
+        elif op == EV_PASS:
+            yield ("pass",)
+            pos += 1
+        elif op == EV_START:
+            seed = _SEED.unpack_from(data, pos + 3)[0] if data[pos + 2] else None
+            yield ("start", data[pos + 1], seed)
+            pos += 3 + (_SEED.size if seed is not None else 0)
+        elif op == EV_KEYFRAME:
+            ply, length = _KEYFRAME.unpack_from(data, pos + 1)
+            body = pos + 1 + _KEYFRAME.size
+            yield ("keyframe", ply, bytes(data[body:body + length]))
+            pos = body + length
+        elif op == EV_WIDE_MOVE:
+            yield ("move", data[pos + 1], data[pos + 2])
+            pos += 3
+        elif op == EV_END:
+            w = data[pos + 1]
+            yield ("end", None if w == NO_WINNER else w)
+            pos += 2
+        else:
+            raise ValueError(f"bad replay event {op:#x} at offset {pos}")
+
+def replay_to(data, index: GameIndex, ply: Optional[int] = None,
+              verify: bool = False) -> LudoGame:
+    """Position of the game `index` after `ply` plies (None: the end),
+    restored from the nearest keyframe. With `verify`, logged captures are
+    checked against the engine."""
+    target = index.plies if ply is None else max(0, min(ply, index.plies))
+    kply, kpos = index.keyframes[0]
+    for p, off in index.keyframes:
+        if p > target:
+            break
+        kply, kpos = p, off
+    game = None
+    done = kply
+    record = None
+    for ev in events(data, kpos, index.end):
+        kind = ev[0]
+        if kind == "keyframe":
+            if ev[1] > target:
+                break
+            if game is None:
+                game = LudoGame.from_bytes(ev[2])
+            else:
+                game.set_bytes(ev[2])
+        elif kind == "roll":
+            if done == target:
+                break
+            done += 1
+            game.dice_value = ev[1]
+            game.awaiting_move = True
+        elif kind == "move":
+            record = game.apply_move(ev[1], ev[2])
+            if record is None:
+                raise ValueError(f"illegal logged move {ev[1:]} at ply {done}")
+        elif kind == "capture":
+            if verify and not any((i, t.id) == ev[1:] for i, t, _ in record[5]):
+                raise ValueError(f"logged capture {ev[1:]} did not happen at ply {done}")
+        elif kind == "pass":
+            game.apply_pass()
+    return game
+
+class ReplayLog:
+    """Random access to the games of a log held in memory (bytes) or any
+    buffer (e.g. an mmap)."""
+
+    def __init__(self, data):
+        if bytes(data[:len(LOG_MAGIC)]) != LOG_MAGIC:
+            raise ValueError("not a Ludo replay log")
+        self.data = data
+        self.index = list(scan(data, len(LOG_MAGIC)))
+
+    @classmethod
+    def open(cls, path: str) -> "ReplayLog":
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def position(self, game: int, ply: Optional[int] = None, verify: bool = False) -> LudoGame:
+        return replay_to(self.data, self.index[game], ply, verify)
+
+    def events(self, game: int) -> Iterator[tuple]:
+        idx = self.index[game]
+        return events(self.data, idx.start, idx.end)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Inspect a Ludo replay log")
+    ap.add_argument("log")
+    ap.add_argument("--game", type=int, default=0)
+    ap.add_argument("--ply", type=int, default=None, help="default: end of the game")
+    ap.add_argument("--events", action="store_true", help="print the game's events")
+    args = ap.parse_args(argv)
+    log = ReplayLog.open(args.log)
+    idx = log.index[args.game]
+    who = "nobody" if idx.winner is None else f"seat {idx.winner}"
+    print(f"{len(log)} games; game {args.game}: {idx.players} players, seed {idx.seed}, "
+          f"{idx.plies} plies, {who} wins")
+    if args.events:
+        for ev in log.events(args.game):
+            print(" ", *ev if ev[0] != "keyframe" else ev[:2])
+    game = log.position(args.game, args.ply, verify=True)
+    for p in game.players:
+        print(f"  {p.name:<7}", " ".join(f"{t.progress:>3}" for t in p.tokens))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+# ludo_sim.py
+"""Headless batch simulator for LudoGame.
+
+Plays complete games back to back without importing pygame and reports
+throughput, game-length and per-seat win-rate statistics.
+
+    python -m ludo_sim --games 1000000 --players 4 --policy random
+    python -m ludo_sim --games 1000000 --workers 16 --seed 42
+    python -m ludo_sim --seed 42 --replay 123456
+    python -m ludo_sim --games 10000 --seed 42 --log games.lrl
+
+With --seed every game gets its own RNG stream derived from
+(master seed, game index), so results do not depend on how games are
+sharded across workers and any single game can be replayed exactly.
+--log records every game's events to a replay log (see ludo_replay), or
+to an archive if the file name ends in .lra (see ludo_archive).
+"""
+import argparse
+import hashlib
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ludo import SEATS, LudoGame, Player
+
+DEFAULT_MAX_TURNS = 10_000
+
+# ----------------- Policies -----------------
+# A policy picks the token id to move for `player` with `dice`, or returns
+# None when nothing is movable. Policies must not allocate: they are called
+# once per roll in the inner loop. Any randomness must come from game.rng.
+
+def policy_first(game: LudoGame, player: Player, dice: int) -> Optional[int]:
+    for t in player.tokens:
+        if t.is_movable_with(dice):
+            return t.id
+    return None
+
+def policy_random(game: LudoGame, player: Player, dice: int) -> Optional[int]:
+    n = 0
+    for t in player.tokens:
+        if t.is_movable_with(dice):
+            n += 1
+    if n == 0:
+        return None
+    k = game.rng.randrange(n)
+    for t in player.tokens:
+        if t.is_movable_with(dice):
+            if k == 0:
+                return t.id
+            k -= 1
+    return None
+
+POLICIES: Dict[str, Callable[[LudoGame, Player, int], Optional[int]]] = {
+    "first": policy_first,
+    "random": policy_random,
+}
+
+# ----------------- Statistics -----------------
+@dataclass
+class SimStats:
+    players: int
+    games: int = 0
+    unfinished: int = 0
+    elapsed: float = 0.0
+    wins: List[int] = field(default_factory=list)
+    win_turns: List[int] = field(default_factory=list)   # winner's own turns, summed
+    lengths: Dict[int, int] = field(default_factory=dict)  # total turns -> games
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        if not self.wins:
+            self.wins = [0] * self.players
+        if not self.win_turns:
+            self.win_turns = [0] * self.players
+
+    def record(self, winner: Optional[int], turns: int, winner_turns: int):
+        self.games += 1
+        self.lengths[turns] = self.lengths.get(turns, 0) + 1
+        if winner is None:
+            self.unfinished += 1
+        else:
+            self.wins[winner] += 1
+            self.win_turns[winner] += winner_turns
+
+    def merge(self, other: "SimStats"):
+        self.games += other.games
+        self.unfinished += other.unfinished
+        self.elapsed = max(self.elapsed, other.elapsed)
+        for i in range(self.players):
+            self.wins[i] += other.wins[i]
+            self.win_turns[i] += other.win_turns[i]
+        for k, v in other.lengths.items():
+            self.lengths[k] = self.lengths.get(k, 0) + v
+
+    def length_percentile(self, q: float) -> int:
+        if not self.lengths:
+            return 0
+        target = q * self.games
+        seen = 0
+        for k in sorted(self.lengths):
+            seen += self.lengths[k]
+            if seen >= target:
+                return k
+        return max(self.lengths)
+
+    def report(self) -> str:
+        lines = []
+        rate = self.games / self.elapsed if self.elapsed > 0 else float("inf")
+        lines.append(f"games: {self.games}  time: {self.elapsed:.2f}s  games/sec: {rate:,.0f}")
+        if self.seed is not None:
+            lines.append(f"master seed: {self.seed}")
+        if self.lengths:
+            total = sum(k * v for k, v in self.lengths.items())
+            lines.append("game length (turns): mean {:.1f}  min {}  p50 {}  p90 {}  p99 {}  max {}".format(
+                total / self.games, min(self.lengths), self.length_percentile(0.5),
+                self.length_percentile(0.9), self.length_percentile(0.99), max(self.lengths)))
+        if self.unfinished:
+            lines.append(f"unfinished (hit turn cap): {self.unfinished}")
+        for i in range(self.players):
+            name = SEATS[i][0]
+            w = self.wins[i]
+            p = w / self.games if self.games else 0.0
+            ci = 1.96 * (p * (1 - p) / self.games) ** 0.5 if self.games else 0.0
+            mean_t = self.win_turns[i] / w if w else 0.0
+            lines.append(f"  seat {i} {name:<6} wins {w:>9}  {100*p:6.2f}% ±{100*ci:.2f}  "
+                         f"turns-to-win {mean_t:.1f}")
+        return "\n".join(lines)
+
+# ----------------- Simulation -----------------
+def play_game(game: LudoGame, policy, max_turns: int, seat_turns: List[int],
+              log=None, seed: Optional[int] = None):
+    """Play one game to completion on `game` (restarted in place).
+
+    Returns (winner index or None, total turns). `seat_turns` is filled with
+    the number of turns each seat took. `log` is an optional
+    ludo_replay.ReplayWriter to record the game to (with `seed`).
+    """
+    game.restart()
+    if log is not None:
+        return _play_logged(game, policy, max_turns, seat_turns, log, seed)
+    players = game.players
+    for i in range(len(seat_turns)):
+        seat_turns[i] = 0
+    turns = 0
+    while turns < max_turns:
+        idx = game.current_turn
+        player = players[idx]
+        dice = game.roll_dice()
+        turns += 1
+        seat_turns[idx] += 1
+        tid = policy(game, player, dice)
+        if tid is None:
+            game.apply_pass()
+            continue
+        game.apply_move(idx, tid)
+        if player.all_finished():
+            return idx, turns
+    return None, turns
+
+def _play_logged(game: LudoGame, policy, max_turns: int, seat_turns: List[int],
+                 log, seed: Optional[int]):
+    """play_game() loop that also feeds the replay log; kept separate so
+    the unlogged loop pays nothing for it."""
+    players = game.players
+    for i in range(len(seat_turns)):
+        seat_turns[i] = 0
+    log.start_game(game, seed)
+    turns = 0
+    winner = None
+    while turns < max_turns:
+        idx = game.current_turn
+        player = players[idx]
+        dice = game.roll_dice()
+        log.roll(dice)
+        turns += 1
+        seat_turns[idx] += 1
+        tid = policy(game, player, dice)
+        if tid is None:
+            game.apply_pass()
+            log.pass_()
+            continue
+        log.move(idx, tid, game.apply_move(idx, tid)[5])
+        if player.all_finished():
+            winner = idx
+            break
+    log.end_game(winner)
+    return winner, turns
+
+def game_seed(master_seed: int, index: int) -> int:
+    """Seed of game `index` under `master_seed`: a stable 64-bit hash, so
+    streams are independent and identical on every machine/process."""
+    digest = hashlib.blake2b(f"{master_seed}:{index}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+def simulate(games: int, players: int = 4, policy: str = "random",
+             max_turns: int = DEFAULT_MAX_TURNS, seed: Optional[int] = None,
+             first_index: int = 0, log=None) -> SimStats:
+    """Play `games` games in this process.
+
+    With `seed` set, game i is played with RNG stream
+    game_seed(seed, first_index + i); otherwise the global RNG is used.
+    Games are recorded to `log` (a ludo_replay.ReplayWriter) if given.
+    """
+    pol = POLICIES[policy]
+    rng = random.Random() if seed is not None else None
+    game = LudoGame(players_count=players, rng=rng)
+    n = len(game.players)
+    stats = SimStats(players=n, seed=seed)
+    seat_turns = [0] * n
+    start = time.perf_counter()
+    for i in range(first_index, first_index + games):
+        gseed = None
+        if rng is not None:
+            gseed = game_seed(seed, i)
+            rng.seed(gseed)
+        winner, turns = play_game(game, pol, max_turns, seat_turns, log, gseed)
+        stats.record(winner, turns, seat_turns[winner] if winner is not None else 0)
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+def _run_shard(args) -> SimStats:
+    games, players, policy, max_turns, seed, first_index = args
+    return simulate(games, players, policy, max_turns, seed, first_index)
+
+def simulate_parallel(games: int, players: int = 4, policy: str = "random",
+                      max_turns: int = DEFAULT_MAX_TURNS, seed: Optional[int] = None,
+                      workers: Optional[int] = None, shards_per_worker: int = 4) -> SimStats:
+    """Shard `games` across a process pool and merge the per-shard stats.
+
+    Shards are contiguous ranges of game indices; since each game's RNG
+    depends only on (seed, index), the merged result is identical to a
+    single-process run with the same seed.
+    """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(63)
+    workers = workers or os.cpu_count() or 1
+    nshards = max(1, min(games, workers * shards_per_worker))
+    base, extra = divmod(games, nshards)
+    jobs = []
+    first = 0
+    for k in range(nshards):
+        count = base + (1 if k < extra else 0)
+        jobs.append((count, players, policy, max_turns, seed, first))
+        first += count
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        parts = list(ex.map(_run_shard, jobs))
+    stats = parts[0]
+    for part in parts[1:]:
+        stats.merge(part)
+    stats.elapsed = time.perf_counter() - start
+    stats.seed = seed
+    return stats
+
+def replay_game(seed: int, index: int, players: int = 4, policy: str = "random",
+                max_turns: int = DEFAULT_MAX_TURNS) -> Tuple[LudoGame, Optional[int], int]:
+    """Re-run game `index` of a seeded batch bit-for-bit.
+
+    Returns (final game state, winner index or None, total turns).
+    """
+    game = LudoGame(players_count=players, rng=random.Random(game_seed(seed, index)))
+    seat_turns = [0] * len(game.players)
+    winner, turns = play_game(game, POLICIES[policy], max_turns, seat_turns)
+    return game, winner, turns
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Headless Ludo batch simulator")
+    ap.add_argument("--games", type=int, default=10_000)
+    ap.add_argument("--players", type=int, default=4, choices=(2, 3, 4))
+    ap.add_argument("--policy", default="random", choices=sorted(POLICIES))
+    ap.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS)
+    ap.add_argument("--seed", type=int, default=None,
+                    help="master seed; each game gets its own derived RNG stream")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="worker processes (0 = one per CPU)")
+    ap.add_argument("--replay", type=int, default=None, metavar="INDEX",
+                    help="re-run a single game of a seeded batch and print it")
+    ap.add_argument("--log", default=None, metavar="FILE",
+                    help="record every game to a replay log, or a *.lra archive "
+                         "(single process only)")
+    args = ap.parse_args(argv)
+
+    if args.replay is not None:
+        if args.seed is None:
+            ap.error("--replay needs --seed")
+        game, winner, turns = replay_game(args.seed, args.replay, args.players,
+                                          args.policy, args.max_turns)
+        who = game.players[winner].name if winner is not None else "nobody"
+        print(f"game {args.replay} of seed {args.seed}: {who} wins after {turns} turns")
+        return
+
+    if args.log is not None:
+        if args.workers != 1:
+            ap.error("--log needs --workers 1")
+        from ludo_archive import ARCHIVE_SUFFIX, ArchiveWriter
+        from ludo_replay import ReplayWriter
+        archive = args.log.endswith(ARCHIVE_SUFFIX)
+        with (ArchiveWriter(args.log) if archive else open(args.log, "wb")) as f:
+            stats = simulate(args.games, args.players, args.policy, args.max_turns, args.seed,
+                             log=ReplayWriter(f, write_header=not archive))
+    elif args.workers == 1:
+        stats = simulate(args.games, args.players, args.policy, args.max_turns, args.seed)
+    else:
+        stats = simulate_parallel(args.games, args.players, args.policy, args.max_turns,
+                                  args.seed, args.workers or None)
+    print(stats.report())
+
+if __name__ == "__main__":
+    main()
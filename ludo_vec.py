@@ -0,0 +1,230 @@
+# ludo_vec.py
+"""NumPy batch engine: K games stored as integer arrays, stepped in lockstep.
+
+Each token is a single progress value along its owner's track (see
+ludo.Token.progress): -1 base, 0..51 ring, 52..56 home, 57 finished.
+The state of K games is a (K, players, 4) int8 array. Every iteration
+rolls one die per game, builds the movable mask, picks a token, applies
+the move and captures, and advances turns, all as array operations.
+
+The rules are the same as LudoGame.move_token plus the auto-pass used by
+main.py / ludo_sim. `check_against_object_engine` replays a traced batch
+through LudoGame and asserts they agree move for move.
+
+    python -m ludo_vec --games 100000 --batch 4096 --players 4 --seed 1
+"""
+import argparse
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ludo import (LudoGame, SEATS, RING_LEN, FINISH_PROGRESS, SAFE_GLOBAL_INDICES,
+                  TOKENS_PER_PLAYER)
+from ludo_sim import SimStats, DEFAULT_MAX_TURNS
+
+BASE = -1
+
+_SAFE = np.zeros(RING_LEN, dtype=bool)
+_SAFE[sorted(SAFE_GLOBAL_INDICES)] = True
+
+VEC_POLICIES = ("first", "random")
+
+class VecLudo:
+    """`batch` independent games of `players` seats advanced one ply per step()."""
+
+    def __init__(self, batch: int, players: int = 4, policy: str = "random",
+                 seed: Optional[int] = None):
+        if policy not in VEC_POLICIES:
+            raise ValueError(f"unknown policy {policy!r}")
+        self.batch = batch
+        self.players = max(2, min(4, players))
+        self.policy = policy
+        self.rng = np.random.default_rng(seed)
+        self.entry = np.array([SEATS[i][2] for i in range(self.players)], dtype=np.int16)
+        self.pos = np.full((batch, self.players, TOKENS_PER_PLAYER), BASE, dtype=np.int8)
+        self.turn = np.zeros(batch, dtype=np.int8)
+        self.turns = np.zeros(batch, dtype=np.int32)
+        self.seat_turns = np.zeros((batch, self.players), dtype=np.int32)
+        self.winner = np.full(batch, -1, dtype=np.int8)
+        self._rows = np.arange(batch)
+        self._seat_ids = np.arange(self.players)
+
+    def reset(self, slots: Optional[np.ndarray] = None):
+        """Restart the games in `slots` (boolean mask or index array; all if None)."""
+        if slots is None:
+            slots = slice(None)
+        self.pos[slots] = BASE
+        self.turn[slots] = 0
+        self.turns[slots] = 0
+        self.seat_turns[slots] = 0
+        self.winner[slots] = -1
+
+    def step(self, active: Optional[np.ndarray] = None):
+        """Advance every active, unfinished game by one roll (and move/pass).
+
+        Returns (dice, chosen token index or -1 for a pass); both are (K,)
+        arrays with -1/0 entries for games that did not play this step.
+        """
+        live = self.winner < 0
+        if active is not None:
+            live &= active
+        rows = self._rows
+        turn = self.turn.astype(np.intp)
+
+        dice = self.rng.integers(1, 7, size=self.batch, dtype=np.int8)
+        if self.policy == "random":
+            u = self.rng.random(self.batch)
+        dice = np.where(live, dice, 0).astype(np.int8)
+
+        cur = self.pos[rows, turn].astype(np.int16)          # (K, 4)
+        d = dice[:, None].astype(np.int16)
+        movable = np.where(cur == BASE, d == 6, (cur >= 0) & (cur + d <= FINISH_PROGRESS))
+        movable &= live[:, None]
+        n_mov = movable.sum(axis=1)
+        moves = n_mov > 0
+
+        if self.policy == "first":
+            choice = np.argmax(movable, axis=1)
+        else:
+            r = np.floor(u * n_mov).astype(np.int16)
+            choice = np.argmax(np.cumsum(movable, axis=1) > r[:, None], axis=1)
+        choice = np.where(moves, choice, -1)
+
+        # Apply the move
+        m_rows = rows[moves]
+        m_seat = turn[moves]
+        m_tok = choice[moves]
+        old = cur[m_rows, m_tok]
+        new = np.where(old == BASE, 0, old + d[moves, 0])
+        self.pos[m_rows, m_seat, m_tok] = new
+
+        # Captures: mover landed on an unsafe ring square
+        on_ring = new < RING_LEN
+        square = (self.entry[m_seat] + new) % RING_LEN
+        hit = on_ring & ~_SAFE[square]
+        if hit.any():
+            h_rows = m_rows[hit]
+            h_seat = m_seat[hit]
+            h_sq = square[hit]
+            others = self.pos[h_rows].astype(np.int16)              # (H, P, 4)
+            ring = (others >= 0) & (others < RING_LEN)
+            gsq = (self.entry[None, :, None] + others) % RING_LEN
+            cap = ring & (gsq == h_sq[:, None, None])
+            cap &= (self._seat_ids[None, :] != h_seat[:, None])[:, :, None]
+            others[cap] = BASE
+            self.pos[h_rows] = others
+
+        # Bookkeeping, winner detection and turn passing
+        self.turns += live
+        self.seat_turns[rows[live], turn[live]] += 1
+        won = np.zeros(self.batch, dtype=bool)
+        won[m_rows] = (self.pos[m_rows, m_seat] == FINISH_PROGRESS).all(axis=1)
+        self.winner[won] = self.turn[won]
+        advance = live & ~won & ((dice != 6) | ~moves)
+        self.turn[advance] = (self.turn[advance] + 1) % self.players
+        return dice, choice
+
+def simulate_vec(games: int, batch: int = 4096, players: int = 4, policy: str = "random",
+                 max_turns: int = DEFAULT_MAX_TURNS, seed: Optional[int] = None) -> SimStats:
+    """Play `games` games, keeping up to `batch` of them in flight.
+
+    Finished slots are restarted in place until the quota is reached.
+    """
+    batch = max(1, min(batch, games))
+    eng = VecLudo(batch, players, policy, seed)
+    stats = SimStats(players=eng.players, seed=seed)
+    started = batch
+    active = np.ones(batch, dtype=bool)
+    start = time.perf_counter()
+    while active.any():
+        eng.step(active)
+        capped = active & (eng.winner < 0) & (eng.turns >= max_turns)
+        done = active & ((eng.winner >= 0) | capped)
+        if not done.any():
+            continue
+        for k in np.flatnonzero(done):
+            w = int(eng.winner[k])
+            if w >= 0:
+                stats.record(w, int(eng.turns[k]), int(eng.seat_turns[k, w]))
+            else:
+                stats.record(None, int(eng.turns[k]), 0)
+        refill = np.flatnonzero(done)[:max(0, games - started)]
+        started += len(refill)
+        eng.reset(refill)
+        active[done] = False
+        active[refill] = True
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+# ----------------- Cross-check against LudoGame -----------------
+class _ScriptedDice:
+    """Stand-in rng for LudoGame that replays a recorded dice sequence."""
+
+    def __init__(self, rolls: List[int]):
+        self._it = iter(rolls)
+
+    def randint(self, a: int, b: int) -> int:
+        return next(self._it)
+
+def trace_batch(batch: int, players: int = 4, policy: str = "random",
+                seed: Optional[int] = None, max_turns: int = DEFAULT_MAX_TURNS):
+    """Run `batch` games to completion, recording every ply.
+
+    Returns (engine, [(dice, choice, pos-after) per ply]).
+    """
+    eng = VecLudo(batch, players, policy, seed)
+    plies: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+    while (eng.winner < 0).any() and int(eng.turns.max()) < max_turns:
+        dice, choice = eng.step()
+        plies.append((dice, choice, eng.pos.copy()))
+    return eng, plies
+
+def check_against_object_engine(batch: int = 64, players: int = 4, policy: str = "random",
+                                seed: Optional[int] = 0) -> int:
+    """Replay a traced batch through LudoGame.move_token, comparing every
+    token after every ply. Returns the number of plies checked; raises
+    AssertionError on the first disagreement."""
+    eng, plies = trace_batch(batch, players, policy, seed)
+    checked = 0
+    for k in range(batch):
+        rolls = [int(dice[k]) for dice, _, _ in plies if dice[k]]
+        game = LudoGame(players_count=players, rng=_ScriptedDice(rolls))
+        for dice, choice, pos in plies:
+            if not dice[k]:
+                break
+            seat = game.current_turn
+            game.roll_dice()
+            j = int(choice[k])
+            if j < 0:
+                assert not game.can_move_any(game.players[seat], int(dice[k])), (k, checked)
+                game.pass_turn()
+            else:
+                assert game.move_token(seat, game.players[seat].tokens[j].id), (k, checked)
+            got = [[t.progress for t in p.tokens] for p in game.players]
+            assert got == pos[k].tolist(), (k, checked, got, pos[k].tolist())
+            checked += 1
+        assert game.winner_index() == (int(eng.winner[k]) if eng.winner[k] >= 0 else None)
+    return checked
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="NumPy lockstep Ludo simulator")
+    ap.add_argument("--games", type=int, default=100_000)
+    ap.add_argument("--batch", type=int, default=4096)
+    ap.add_argument("--players", type=int, default=4, choices=(2, 3, 4))
+    ap.add_argument("--policy", default="random", choices=VEC_POLICIES)
+    ap.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--check", action="store_true",
+                    help="cross-check a traced batch against LudoGame and exit")
+    args = ap.parse_args(argv)
+    if args.check:
+        n = check_against_object_engine(min(args.batch, 256), args.players, args.policy, args.seed)
+        print(f"ok: {n} plies agree with LudoGame.move_token")
+        return
+    stats = simulate_vec(args.games, args.batch, args.players, args.policy,
+                         args.max_turns, args.seed)
+    print(stats.report())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# ludo_winprob.py
+"""Win-probability estimates for LudoGame positions.
+
+estimate_win_probabilities(game) returns each seat's chance of winning
+from the current position, estimated by playing it out to the end
+(rollouts with the MCTS playout policy) in batches until the widest
+per-seat confidence interval is within `half_width`. Results live in a
+bounded LRU cache keyed by position_key(), which ignores token ids, so
+transpositions share one estimate, and a cached estimate that is not yet
+precise enough is refined rather than recomputed. Positions covered by a
+ludo_tablebase.Tablebase are answered exactly.
+
+WinProbService keeps the estimate of the latest requested position up
+to date in a daemon thread, publishing as the interval narrows, so the
+pygame UI can show it live (main.py --winprob) while rendering normally.
+"""
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from ludo import LudoGame
+from ludo_mcts import pick_heuristic
+
+Z_95 = 1.96                     # normal quantile of a 95% confidence interval
+MAX_ROLLOUT_PLIES = 5000        # a rollout still running after this counts for no one
+
+def position_key(game: LudoGame) -> tuple:
+    """Canonical key of `game`'s position: side to move, pending dice and
+    each seat's entry square and sorted token progress."""
+    return (game.current_turn, game.dice_value or 0,
+            tuple((p.entry_global, tuple(sorted(t.progress for t in p.tokens)))
+                  for p in game.players))
+
+@dataclass
+class Estimate:
+    """Rollout counts for one position. `counts` is (wins per seat,
+    rollouts) and is only ever replaced whole, by add(), so a reader in
+    another thread always sees wins and rollouts that belong together."""
+    counts: Tuple[Tuple[int, ...], int]
+    exact: List[float] = field(default_factory=list)   # set for decided/tablebase positions
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def wins(self) -> Tuple[int, ...]:
+        return self.counts[0]
+
+    @property
+    def rollouts(self) -> int:
+        return self.counts[1]
+
+    def add(self, wins: List[int], rollouts: int):
+        """Add a batch; safe against concurrent add() calls."""
+        with self._lock:
+            old, n = self.counts
+            self.counts = (tuple(a + b for a, b in zip(old, wins)), n + rollouts)
+
+    @property
+    def probabilities(self) -> List[float]:
+        if self.exact:
+            return list(self.exact)
+        wins, n = self.counts
+        return [w / n if n else 1.0 / len(wins) for w in wins]
+
+    def half_width(self, z: float = Z_95) -> float:
+        """Widest per-seat confidence half-interval (Agresti-Coull, so it
+        does not collapse to 0 when a seat has won every rollout so far);
+        0 if exact."""
+        if self.exact:
+            return 0.0
+        wins, rollouts = self.counts
+        n = rollouts + z * z
+        widest = 0.0
+        for w in wins:
+            p = (w + z * z / 2) / n
+            widest = max(widest, z * math.sqrt(p * (1.0 - p) / n))
+        return widest
+
+class EstimateCache:
+    """LRU map of position_key() -> Estimate, shared between threads."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[tuple, Estimate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[Estimate]:
+        with self._lock:
+            est = self._items.get(key)
+            if est is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return est
+
+    def put(self, key: tuple, est: Estimate):
+        with self._lock:
+            self._items[key] = est
+            self._items.move_to_end(key)
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+DEFAULT_CACHE = EstimateCache()
+
+# ----------------- Rollouts -----------------
+def rollout(g: LudoGame, rng: random.Random, heuristic: bool = True) -> Optional[int]:
+    """Play `g` to the end with the playout policy and undo it again.
+    Returns the winning seat (None if MAX_ROLLOUT_PLIES ran out)."""
+    records = []
+    winner = None
+    try:
+        for _ in range(MAX_ROLLOUT_PLIES):
+            seat = g.current_turn
+            if g.dice_value is None:
+                g.dice_value = rng.randint(1, 6)
+                g.awaiting_move = True
+            moves = g.legal_moves(seat, g.dice_value)
+            if not moves:
+                records.append(g.apply_pass())
+                continue
+            m = pick_heuristic(rng, moves) if heuristic else moves[rng.randrange(len(moves))]
+            records.append(g.make_move(m))
+            if g.players[seat].all_finished():
+                winner = seat
+                break
+    finally:
+        for record in reversed(records):
+            g.undo_move(record)
+    return winner
+
+def refine(g: LudoGame, est: Estimate, rollouts: int, rng: random.Random,
+           heuristic: bool = True):
+    """Add `rollouts` playouts from `g` (left unchanged) to `est`, in one
+    Estimate.add() at the end."""
+    wins = [0] * len(est.wins)
+    for _ in range(rollouts):
+        w = rollout(g, rng, heuristic)
+        if w is not None:
+            wins[w] += 1
+    est.add(wins, rollouts)
+
+def _start(game: LudoGame, key: tuple, cache: Optional[EstimateCache],
+           tablebase) -> Estimate:
+    """The cached estimate for `key`, or a new (possibly exact) one."""
+    est = cache.get(key) if cache is not None else None
+    if est is not None:
+        return est
+    n = len(game.players)
+    est = Estimate(((0,) * n, 0))
+    winner = game.winner_index()
+    if winner is not None:
+        est.exact = [1.0 if s == winner else 0.0 for s in range(n)]
+    elif tablebase is not None:
+        p = tablebase.win_probability(game)
+        if p is not None:
+            est.exact = [p if s == game.current_turn else 1.0 - p for s in range(n)]
+    if cache is not None:
+        cache.put(key, est)
+    return est
+
+def estimate(game: LudoGame, half_width: float = 0.02, batch: int = 64,
+             max_rollouts: int = 20_000, cache: Optional[EstimateCache] = DEFAULT_CACHE,
+             rng: Optional[random.Random] = None, heuristic: bool = True,
+             tablebase=None, z: float = Z_95) -> Estimate:
+    """Estimate for `game` whose confidence half-width is at most
+    `half_width` (or which has `max_rollouts` rollouts). `game` is not
+    modified."""
+    est = _start(game, position_key(game), cache, tablebase)
+    if est.exact or (est.rollouts and est.half_width(z) <= half_width) \
+            or est.rollouts >= max_rollouts:
+        return est
+    g = game.clone()
+    rng = rng or random.Random()
+    while est.rollouts < max_rollouts:
+        refine(g, est, min(batch, max_rollouts - est.rollouts), rng, heuristic)
+        if est.half_width(z) <= half_width:
+            break
+    return est
+
+def estimate_win_probabilities(game: LudoGame, half_width: float = 0.02, **kwargs) -> List[float]:
+    """Per-seat probability of winning from `game`'s position, to within
+    ±half_width at 95% confidence (see estimate() for the options)."""
+    return estimate(game, half_width, **kwargs).probabilities
+
+# ----------------- Background service -----------------
+class WinProbService:
+    """Estimates the most recently requested position in a daemon thread.
+
+    request(game) is cheap when the position has not changed, so the UI
+    can call it every frame; result(game) returns the latest Estimate for
+    that position (refined in place as rollouts arrive) or None.
+    `on_update`, if given, is called from the worker at most every
+    `update_interval` seconds while an estimate improves, and once when it
+    is done (main.py posts a wake-up event from it).
+    """
+
+    def __init__(self, half_width: float = 0.01, batch: int = 16, max_rollouts: int = 50_000,
+                 cache: Optional[EstimateCache] = DEFAULT_CACHE, tablebase=None,
+                 heuristic: bool = True, on_update: Optional[Callable[[], None]] = None,
+                 update_interval: float = 0.1, seed: Optional[int] = None):
+        self.half_width = half_width
+        self.batch = batch
+        self.max_rollouts = max_rollouts
+        self.cache = cache if cache is not None else EstimateCache()
+        self.tablebase = tablebase
+        self.heuristic = heuristic
+        self.on_update = on_update
+        self.update_interval = update_interval
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending: Optional[Tuple[tuple, LudoGame]] = None
+        self._key: Optional[tuple] = None
+        self._current: Optional[Tuple[tuple, Estimate]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def request(self, game: LudoGame):
+        key = position_key(game)
+        if key == self._key:
+            return
+        self._key = key
+        with self._lock:
+            self._pending = (key, game.clone())
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def result(self, game: LudoGame) -> Optional[Estimate]:
+        current = self._current
+        if current is None or current[0] != position_key(game):
+            return None
+        return current[1]
+
+    def close(self, timeout: float = 1.0):
+        """Stop the worker, waiting up to `timeout` for its current batch,
+        after which on_update is no longer called."""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                job, self._pending = self._pending, None
+            if job is not None:
+                self._estimate(*job)
+
+    def _estimate(self, key: tuple, g: LudoGame):
+        est = _start(g, key, self.cache, self.tablebase)
+        self._current = (key, est)
+        last = 0.0
+        while not est.exact and est.rollouts < self.max_rollouts \
+                and not (est.rollouts and est.half_width() <= self.half_width):
+            if self._pending is not None or self._closed:
+                return                  # the position moved on
+            refine(g, est, self.batch, self.rng, self.heuristic)
+            now = time.perf_counter()
+            if self.on_update is not None and now - last >= self.update_interval \
+                    and not self._closed:
+                last = now
+                self.on_update()
+            time.sleep(0)               # let the render thread have the GIL
+        if self.on_update is not None and not self._closed:
+            self.on_update()
@@ -1,28 +1,185 @@
+import argparse
+import os
 import pygame
 import sys
+import threading
+import time
 from ludo import LudoGame
+from ludo_ai import ExpectiminimaxBot, BotThread, SEARCH_FAILED
+from ludo_mcts import MCTSBot
+from ludo_journal import GameJournal
+from ludo_tablebase import Tablebase
+from ludo_winprob import WinProbService
 from ui_pygame import UI, W, H
+from ui_profile import FrameProfiler
 
-def main():
+# Pause before a computer seat rolls, so humans can follow its turns
+BOT_DELAY_MS = 500
+
+# Posted by the bot thread when its search finishes, to wake the loop
+BOT_DONE = pygame.USEREVENT + 1
+# Posted by the win-probability service when its estimate improves
+WINPROB_UPDATE = pygame.USEREVENT + 2
+
+# The loop sleeps in pygame.event.wait(); only these events wake it
+WAKE_EVENTS = [pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.KEYDOWN,
+               pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, BOT_DONE, WINPROB_UPDATE]
+
+class LoopMeter:
+    """--measure: process CPU use while the table sits idle, then the
+    latency from synthetic clicks on Roll to the frame that shows them."""
+
+    def __init__(self, seconds, clicks=20, interval=0.2):
+        self.seconds = seconds
+        self.clicks = clicks
+        self.interval = interval
+        self.latencies = []
+        self._pending = []
+        self._idle = None
+
+    def start(self, pos):
+        """Measure idle for `seconds`, then post clicks at `pos`."""
+        def run():
+            wall, cpu = time.perf_counter(), time.process_time()
+            time.sleep(self.seconds)
+            self._idle = (time.process_time() - cpu) / (time.perf_counter() - wall)
+            for _ in range(self.clicks):
+                pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1,
+                                                     t=time.perf_counter()))
+                pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=1))
+                time.sleep(self.interval)
+            time.sleep(self.interval)
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+        threading.Thread(target=run, daemon=True).start()
+
+    def input(self, event):
+        t = getattr(event, "t", None)
+        if t is not None:
+            self._pending.append(t)
+
+    def presented(self):
+        now = time.perf_counter()
+        self.latencies.extend(now - t for t in self._pending)
+        self._pending.clear()
+
+    def report(self) -> str:
+        lines = [f"idle CPU: {100 * (self._idle or 0.0):.1f}% over {self.seconds:.1f}s"]
+        lat = sorted(1000 * x for x in self.latencies)
+        if lat:
+            lines.append(f"input-to-present latency: n {len(lat)}  p50 {lat[len(lat) // 2]:.2f} ms  "
+                         f"p95 {lat[int(len(lat) * 0.95)]:.2f} ms  max {lat[-1]:.2f} ms")
+        return "\n".join(lines)
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Ludo")
+    ap.add_argument("--players", type=int, default=2, choices=(2, 3, 4))
+    ap.add_argument("--ai", type=int, action="append", default=[], metavar="SEAT",
+                    help="make seat 0-3 a computer player (repeatable)")
+    ap.add_argument("--think", type=float, default=0.5,
+                    help="computer thinking time per move, seconds")
+    ap.add_argument("--engine", default="expectiminimax", choices=("expectiminimax", "mcts"),
+                    help="search used by computer seats")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="worker processes for --engine mcts (root parallel)")
+    ap.add_argument("--tablebase", default=None, metavar="FILE",
+                    help="endgame table from 'python -m ludo_tablebase build' for computer seats")
+    ap.add_argument("--winprob", action="store_true",
+                    help="show live win chances, estimated in a background thread")
+    ap.add_argument("--theme", default="classic", choices=("classic", "image"),
+                    help="board look: drawn squares or the board picture")
+    ap.add_argument("--dirty", action="store_true",
+                    help="redraw and update only the changed parts of the window")
+    ap.add_argument("--autosave", action="store_true",
+                    help="resume savegame.json and journal every roll and move to it")
+    ap.add_argument("--measure", type=float, default=None, metavar="SECONDS",
+                    help="sit idle for SECONDS, then click Roll a few times; print idle "
+                         "CPU%% and input-to-present latency and exit")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     pygame.init()
     screen = pygame.display.set_mode((W, H))
     pygame.display.set_caption("Ludo — Full Rules")
-    clock = pygame.time.Clock()
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(WAKE_EVENTS)
 
-    game = LudoGame(players_count=2)
+    game = LudoGame(players_count=args.players)
+    journal = None
+    if args.autosave:
+        journal = GameJournal("savegame.json")
+        journal.attach(game)
     ui = UI(game)
+    ui.set_theme(args.theme)
+    prof = ui.profiler = FrameProfiler.from_env()
+
+    # Seat types: seats listed in --ai are played by the computer
+    ai_seats = set(args.ai)
+    tablebase = Tablebase(args.tablebase) if args.tablebase else None
+    if args.engine == "mcts":
+        engine = MCTSBot(time_budget=args.think, workers=args.workers, tablebase=tablebase)
+    else:
+        engine = ExpectiminimaxBot(time_budget=args.think, tablebase=tablebase)
+    bot = BotThread(engine)
+    winprob = None
+    if args.winprob:
+        winprob = ui.winprob = WinProbService(
+            tablebase=tablebase,
+            on_update=lambda: pygame.event.post(pygame.event.Event(WINPROB_UPDATE)))
+    next_bot_roll = 0
+
+    meter = None
+    if args.measure is not None:
+        meter = LoopMeter(args.measure)
+        meter.start(ui.btn_roll.rect.center)
+
+    def wake_loop():
+        pygame.event.post(pygame.event.Event(BOT_DONE))
 
     running = True
     winner_announced = False
+    redraw = True
+    timeout = 0
 
     while running:
-        for event in pygame.event.get():
+        # Sleep until input, a bot result or the next bot timer (unless a
+        # frame is still owed)
+        events = []
+        if not redraw:
+            first = pygame.event.wait(timeout) if timeout else pygame.event.wait()
+            if first.type != pygame.NOEVENT:
+                events.append(first)
+        events.extend(pygame.event.get())
+        t_wake = time.perf_counter()
+        if prof is not None:
+            prof.begin()
+        for event in events:
+            redraw = True
+            if meter is not None:
+                meter.input(event)
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                ui.invalidate()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                if prof is None:
+                    prof = ui.profiler = FrameProfiler()
+                else:
+                    prof.visible = not prof.visible
+                ui.invalidate()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4 and prof is not None:
+                print(f"frame times written to {prof.dump_csv()}")
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                ui.release()
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 act = ui.click(event.pos)
+                if game.current_turn in ai_seats and (act == "roll" or act.startswith("move:")):
+                    act = ""
                 if act == "quit":
                     running = False
+                elif act == "undo":
+                    game.undo()
+                    winner_announced = game.winner_index() is not None
                 elif act == "add":
                     game.add_player()
                 elif act == "del":
@@ -35,25 +192,106 @@ def main():
                 elif act == "roll":
                     if not game.awaiting_move:
                         dice = game.roll_dice()
-                        if not game.can_move_any(game.current_player(), dice):
-                            game.dice_value = None
-                            game.awaiting_move = False
-                            game._advance_turn()
+                        if not game.legal_moves(game.current_turn, dice):
+                            game.pass_turn()
                 elif act.startswith("move:"):
                     tid = int(act.split(":")[1])
                     if game.dice_value is not None:
-                        game.move_token(game.current_turn, tid)
+                        for move in game.legal_moves(game.current_turn, game.dice_value):
+                            if move.token_id == tid:
+                                game.play(move)
+                                break
+
+        # Computer seat: roll after a short pause, then search in the
+        # background while the window stays responsive; play the move once
+        # the bot thread posts BOT_DONE. `timeout` is when to wake next
+        # (0 = only on an event).
+        timeout = 0
+        if game.current_turn in ai_seats and game.winner_index() is None:
+            now = pygame.time.get_ticks()
+            if not game.awaiting_move:
+                ui.note = ""
+                if now >= next_bot_roll:
+                    dice = game.roll_dice()
+                    if not game.legal_moves(game.current_turn, dice):
+                        game.pass_turn()
+                    next_bot_roll = now + BOT_DELAY_MS
+                    redraw = True
+                    timeout = 1
+                else:
+                    timeout = next_bot_roll - now
+            elif not game.legal_moves(game.current_turn, game.dice_value):
+                game.pass_turn()    # dice pending with no move, e.g. from a save
+                redraw = True
+                timeout = 1
+            elif not bot.busy:
+                bot.start(game, on_done=wake_loop)
+                ui.note = "(thinking)"
+                redraw = True
+            else:
+                tid = bot.poll(game)
+                if tid == SEARCH_FAILED:
+                    print(f"Computer search failed ({bot.error!r}); playing the first legal move.")
+                    ui.note = ""
+                    game.play(game.legal_moves(game.current_turn, game.dice_value)[0])
+                    redraw = True
+                    timeout = 1
+                elif tid == 0:
+                    ui.note = ""
+                    game.pass_turn()
+                    redraw = True
+                    timeout = 1
+                elif tid is not None:
+                    ui.note = ""
+                    for move in game.legal_moves(game.current_turn, game.dice_value):
+                        if move.token_id == tid:
+                            game.play(move)
+                            break
+                    redraw = True
+                    timeout = 1
+                elif not bot.busy:
+                    timeout = 1     # stale result dropped: search again
+        elif ui.note:
+            ui.note = ""
+            redraw = True
 
-        ui.draw(screen)
-        pygame.display.flip()
+        if winprob is not None:
+            winprob.request(game)       # no-op unless the position changed
+
+        if redraw:
+            if prof is not None:
+                prof.add("events", time.perf_counter() - t_wake)
+            if args.dirty:
+                rects = ui.render(screen)
+                t_present = time.perf_counter()
+                if rects:
+                    pygame.display.update(rects)
+            else:
+                ui.draw(screen)
+                t_present = time.perf_counter()
+                pygame.display.flip()
+            if prof is not None:
+                prof.add("present", time.perf_counter() - t_present)
+                prof.end()
+            redraw = False
+            if meter is not None:
+                meter.presented()
 
         widx = game.winner_index()
         if widx is not None and not winner_announced:
             print(f"{game.players[widx].name} wins!")
             winner_announced = True
 
-        clock.tick(30)
-
+    if isinstance(engine, MCTSBot):
+        engine.close()
+    if winprob is not None:
+        winprob.close()
+    if journal is not None:
+        journal.close()
+    if meter is not None:
+        print(meter.report())
+    if prof is not None and os.environ.get("LUDO_PROFILE_CSV"):
+        print(f"frame times written to {prof.dump_csv()}")
     pygame.quit()
     sys.exit()
 
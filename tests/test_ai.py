@@ -0,0 +1,103 @@
+import random
+import time
+import unittest
+from ludo import LudoGame
+from ludo_ai import ExpectiminimaxBot, BotThread, SEARCH_FAILED, WIN, LOSS
+
+def plain_expectimax(bot, g, depth):
+    """Unpruned reference search with the bot's evaluation."""
+    def chance(d):
+        if d <= 0:
+            return bot._evaluate()
+        total = 0.0
+        for dice in range(1, 7):
+            g.dice_value = dice
+            total += decision(d)
+        g.dice_value = None
+        return total / 6
+
+    def decision(d):
+        seat = g.current_turn
+        moves = g.legal_moves(seat, g.dice_value)
+        if not moves:
+            rec = g.apply_pass()
+            v = chance(d - 1)
+            g.undo_move(rec)
+            return v
+        vals = []
+        for m in moves:
+            rec = g.make_move(m)
+            if g.players[seat].all_finished():
+                vals.append(WIN if seat == bot.root_seat else LOSS)
+            else:
+                vals.append(chance(d - 1))
+            g.undo_move(rec)
+        return max(vals) if seat == bot.root_seat else min(vals)
+
+    return decision(depth)
+
+def midgame(seed, players=2, plies=60):
+    g = LudoGame(players, rng=random.Random(seed))
+    for _ in range(plies):
+        moves = g.legal_moves(g.current_turn, g.roll_dice())
+        g.play(g.rng.choice(moves)) if moves else g.pass_turn()
+    g.roll_dice()
+    return g
+
+class TestExpectiminimax(unittest.TestCase):
+    def test_pruned_search_matches_plain_expectimax(self):
+        for seed in range(4):
+            for star2 in (False, True):
+                g = midgame(seed, players=3)
+                bot = ExpectiminimaxBot(time_budget=60, star2=star2)
+                bot.g, bot.root_seat, bot.deadline = g, g.current_turn, time.perf_counter() + 60
+                bot._tt.clear()
+                moves = g.legal_moves(g.current_turn, g.dice_value)
+                if not moves:
+                    continue
+                _, value = bot._root(list(moves), 2)
+                self.assertAlmostEqual(value, plain_expectimax(bot, g, 2), places=9)
+
+    def test_choose_move_respects_budget_and_keeps_game(self):
+        g = midgame(7, players=4)
+        before = g.zobrist
+        bot = ExpectiminimaxBot(time_budget=0.2)
+        start = time.perf_counter()
+        move = bot.choose_move(g)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(g.zobrist, before)
+        if g.legal_moves(g.current_turn, g.dice_value):
+            self.assertIn(move, g.legal_moves(g.current_turn, g.dice_value))
+
+    def test_bot_thread(self):
+        g = midgame(3)
+        worker = BotThread(ExpectiminimaxBot(time_budget=0.1))
+        worker.start(g)
+        deadline = time.time() + 5
+        tid = None
+        while tid is None and time.time() < deadline:
+            time.sleep(0.01)
+            tid = worker.poll(g)
+        self.assertIsNotNone(tid)
+
+    def test_bot_thread_reports_failed_search(self):
+        class Broken:
+            def choose_move(self, game):
+                raise RuntimeError("corrupt tablebase")
+
+        g = midgame(3)
+        woken = []
+        worker = BotThread(Broken())
+        worker.start(g, on_done=lambda: woken.append(1))
+        deadline = time.time() + 5
+        tid = None
+        while tid is None and time.time() < deadline:
+            time.sleep(0.01)
+            tid = worker.poll(g)
+        self.assertEqual(tid, SEARCH_FAILED)
+        self.assertIsInstance(worker.error, RuntimeError)
+        self.assertFalse(worker.busy)
+        self.assertEqual(woken, [1])
+
+if __name__ == "__main__":
+    unittest.main()
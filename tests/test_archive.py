@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from ludo_archive import Archive, ArchiveWriter, pack
+from ludo_replay import ReplayLog, ReplayWriter
+from ludo_sim import replay_game, simulate
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "games.lra")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_simulate_into_archive(self):
+        with ArchiveWriter(self.path) as w:
+            simulate(25, players=2, seed=7, log=ReplayWriter(w, keyframe_every=8, write_header=False))
+        with Archive(self.path) as archive:
+            self.assertEqual(len(archive), 25)
+            for i in (0, 12, -1):
+                g = archive[i]
+                final, winner, turns = replay_game(7, g.index, players=2)
+                self.assertEqual((g.winner, g.plies, g.players), (winner, turns, 2))
+                self.assertEqual(g.position(verify=True).to_dict(), final.to_dict())
+            self.assertEqual([g.index for g in archive], list(range(25)))
+            self.assertEqual([g.index for g in archive[20:]], [20, 21, 22, 23, 24])
+            with self.assertRaises(IndexError):
+                archive[25]
+
+    def test_pack_logs(self):
+        logs = []
+        for k in range(2):
+            path = os.path.join(self.dir.name, f"{k}.lrl")
+            with open(path, "wb") as f:
+                simulate(10, seed=k, log=ReplayWriter(f))
+            logs.append(path)
+        self.assertEqual(pack(self.path, logs), 20)
+        second = ReplayLog.open(logs[1])
+        with Archive(self.path) as archive:
+            g = archive[13]
+            self.assertEqual(g.seed, second.index[3].seed)
+            self.assertEqual(list(g.events()), list(second.events(3)))
+            self.assertEqual(g.position(40).to_dict(), second.position(3, 40).to_dict())
+
+    def test_rejects_other_files(self):
+        for data in (b"", b"LUDOLOG\x01", b"LUDOARC\x01" + bytes(8) + b"\xff" * 8):
+            with open(self.path, "wb") as f:
+                f.write(data)
+            with self.assertRaises(ValueError):
+                Archive(self.path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import random
+import tempfile
+import unittest
+from ludo import LudoGame
+from ludo_journal import GameJournal, journal_path, read_journal
+
+def play_plies(game, n, rng):
+    for _ in range(n):
+        if game.winner_index() is not None:
+            return
+        moves = game.legal_moves(game.current_turn, game.roll_dice())
+        if moves:
+            game.play(rng.choice(moves))
+        else:
+            game.pass_turn()
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "save.json")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def journaled_game(self, snapshot_every=1000):
+        game = LudoGame(4, rng=random.Random(5))
+        journal = GameJournal(self.path, snapshot_every=snapshot_every, sync=False)
+        journal.attach(game)
+        return game, journal
+
+    def test_load_replays_journal_tail(self):
+        game, journal = self.journaled_game()
+        play_plies(game, 150, random.Random(1))
+        game.roll_dice()                       # a pending roll is journaled too
+        self.assertGreater(journal.records, 150)
+        loaded = LudoGame(2)
+        self.assertTrue(loaded.load(self.path))    # no close(): as after a crash
+        self.assertEqual(loaded.to_dict(), game.to_dict())
+        self.assertEqual(loaded.zobrist, game.zobrist)
+        self.assertTrue(loaded.awaiting_move)
+        journal.close()
+
+    def test_periodic_snapshot_restarts_journal(self):
+        game, journal = self.journaled_game(snapshot_every=10)
+        play_plies(game, 95, random.Random(2))
+        gen, records = read_journal(journal_path(self.path))
+        self.assertEqual(gen, journal.generation)
+        self.assertLess(len(records), 10)
+        loaded = LudoGame(2)
+        loaded.load(self.path)
+        self.assertEqual(loaded.to_dict(), game.to_dict())
+        journal.close()
+
+    def test_torn_tail_is_ignored(self):
+        game, journal = self.journaled_game()
+        play_plies(game, 40, random.Random(3))
+        expected = game.to_dict()
+        journal.close()
+        with open(journal_path(self.path), "ab") as f:
+            f.write(b"m 0 1 0000")              # crash mid-append
+        loaded = LudoGame(2)
+        loaded.load(self.path)
+        self.assertEqual(loaded.to_dict(), expected)
+
+    def test_stale_journal_is_not_replayed(self):
+        game, journal = self.journaled_game()
+        play_plies(game, 30, random.Random(4))
+        journal.close()
+        with open(journal_path(self.path), "rb") as f:
+            old = f.read()
+        journal.snapshot(game)                  # new snapshot includes those moves
+        expected = game.to_dict()
+        journal.close()
+        with open(journal_path(self.path), "wb") as f:
+            f.write(old)                        # crash before the journal was reset
+        loaded = LudoGame(2)
+        loaded.load(self.path)
+        self.assertEqual(loaded.to_dict(), expected)
+
+    def test_undo_and_resume(self):
+        game, journal = self.journaled_game()
+        play_plies(game, 60, random.Random(6))
+        game.undo()
+        game.undo()
+        play_plies(game, 5, random.Random(7))
+        journal.detach()
+        resumed = LudoGame(2)
+        again = GameJournal(self.path, sync=False)
+        self.assertTrue(again.attach(resumed))
+        self.assertEqual(resumed.to_dict(), game.to_dict())
+        self.assertGreater(again.generation, journal.generation)
+        again.close()
+
+    def test_binary_snapshots(self):
+        self.path = os.path.join(self.dir.name, "save.ludo")
+        game, journal = self.journaled_game(snapshot_every=25)
+        play_plies(game, 80, random.Random(9))
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(4), b"LUDO")
+        loaded = LudoGame(2)
+        loaded.load(self.path)
+        self.assertEqual(loaded.to_dict(), game.to_dict())
+        journal.close()
+
+if __name__ == "__main__":
+    unittest.main()
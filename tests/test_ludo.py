@@ -15,5 +15,244 @@ class TestLudoGame(unittest.TestCase):
         self.assertIsNotNone(token)
         self.assertEqual(token.position, (1,1))
 
+class TestOccupancyIndex(unittest.TestCase):
+    def setUp(self):
+        LudoGame.debug_index = True
+
+    def tearDown(self):
+        LudoGame.debug_index = False
+
+    def test_index_tracks_random_games(self):
+        from ludo_sim import simulate
+        simulate(20, players=4, seed=1)
+
+    def test_capture_uses_index(self):
+        game = LudoGame(players_count=2)
+        red, green = game.players
+        green.tokens[0].state, green.tokens[0].ring_rel = "ring", 40   # global 1
+        red.tokens[0].state, red.tokens[0].ring_rel = "ring", 0
+        game.rebuild_index()
+        self.assertTrue(game.is_occupied(1))
+        game.dice_value = 1
+        self.assertTrue(game.move_token(0, 1))
+        self.assertEqual(green.tokens[0].state, "base")
+        self.assertEqual([(i, t.id) for i, t in game.occupants(1)], [(0, 1)])
+
+    def test_remove_player_updates_index(self):
+        game = LudoGame(players_count=3)
+        game.players[2].tokens[0].state, game.players[2].tokens[0].ring_rel = "ring", 5
+        game.rebuild_index()
+        game.remove_player()
+        game.check_index()
+        self.assertFalse(game.is_occupied(31))
+
+class TestCompactTokens(unittest.TestCase):
+    def test_state_strings_and_codes(self):
+        from ludo import Token, TokenState
+        t = Token(id=2)
+        self.assertEqual(t.state, "base")
+        t.state = "home"
+        self.assertEqual(t.code, TokenState.HOME)
+        self.assertFalse(hasattr(t, "__dict__"))
+
+    def test_json_shape_round_trips(self):
+        game = LudoGame(players_count=2)
+        game.players[0].tokens[1].state = "ring"
+        game.players[0].tokens[1].ring_rel = 7
+        d = game.players[0].to_dict()
+        self.assertEqual(d["tokens"][1], {"id": 2, "state": "ring", "ring_rel": 7, "home_idx": -1})
+        from ludo import Player
+        self.assertEqual(Player.from_dict(d), game.players[0])
+
+class TestUndo(unittest.TestCase):
+    def snapshot(self, game):
+        return ([p.to_dict() for p in game.players], game.current_turn,
+                game.dice_value, game.awaiting_move)
+
+    def test_undo_capture_restores_exact_state(self):
+        game = LudoGame(players_count=2)
+        red, green = game.players
+        green.tokens[0].state, green.tokens[0].ring_rel = "ring", 40   # global 1
+        red.tokens[0].state, red.tokens[0].ring_rel = "ring", 0
+        game.rebuild_index()
+        game.roll_dice()
+        game.dice_value = 1
+        before = self.snapshot(game)
+        record = game.apply_move(0, 1)
+        self.assertEqual(green.tokens[0].state, "base")
+        self.assertEqual(game.current_turn, 1)
+        game.undo_move(record)
+        self.assertEqual(self.snapshot(game), before)
+        game.check_index()
+
+    def test_multi_level_undo_with_extra_turn(self):
+        import random
+        game = LudoGame(players_count=3, rng=random.Random(8))
+        states = []
+        for _ in range(150):
+            before_roll = self.snapshot(game)
+            dice = game.roll_dice()
+            movable = [t.id for t in game.current_player().tokens if t.is_movable_with(dice)]
+            if movable:
+                states.append(self.snapshot(game))
+                game.move_token(game.current_turn, movable[-1])
+            else:
+                states.append(before_roll)      # undoing a pass takes back its roll
+                game.pass_turn()
+        while states:
+            self.assertTrue(game.undo())
+            self.assertEqual(self.snapshot(game), states.pop())
+        self.assertFalse(game.undo())
+        game.check_index()
+
+    def test_undo_forced_pass_lets_player_roll_again(self):
+        import random
+        game = LudoGame(players_count=2, rng=random.Random(1))
+        game.roll_dice()
+        game.dice_value = 3                 # all tokens in base: no legal move
+        self.assertFalse(game.legal_moves(0, 3))
+        game.pass_turn()
+        self.assertEqual(game.current_turn, 1)
+        self.assertTrue(game.undo())
+        self.assertEqual(game.current_turn, 0)
+        self.assertIsNone(game.dice_value)
+        self.assertFalse(game.awaiting_move)
+        self.assertEqual(game.zobrist, game.compute_zobrist())
+        dice = game.roll_dice()
+        self.assertEqual(game.current_turn, 0)
+        self.assertEqual(game.dice_value, dice)
+
+class TestLegalMoves(unittest.TestCase):
+    def test_matches_is_movable_and_predicts_captures(self):
+        import random
+        rng = random.Random(12)
+        game = LudoGame(players_count=4, rng=random.Random(3))
+        for _ in range(400):
+            dice = game.roll_dice()
+            seat = game.current_turn
+            moves = game.legal_moves(seat, dice)
+            self.assertIs(moves, game.legal_moves(seat, dice))   # cached per roll
+            self.assertEqual([m.token_id for m in moves],
+                             [t.id for t in game.players[seat].tokens if t.is_movable_with(dice)])
+            if not moves:
+                game.pass_turn()
+                continue
+            move = rng.choice(moves)
+            before = sum(t.state == "base" for p in game.players for t in p.tokens)
+            self.assertTrue(game.play(move))
+            after = sum(t.state == "base" for p in game.players for t in p.tokens)
+            self.assertEqual(after > before - (move.src == -1), move.capture)
+            self.assertEqual(move.token.progress, move.dst)
+
+    def test_stale_move_is_rejected(self):
+        game = LudoGame(players_count=2)
+        game.dice_value = 6
+        move = game.legal_moves(0, 6)[0]
+        self.assertTrue(game.play(move))
+        game.dice_value = 6
+        self.assertFalse(game.play(move))
+
+class TestZobrist(unittest.TestCase):
+    def test_incremental_hash_matches_recompute_and_undo(self):
+        import random
+        game = LudoGame(players_count=4, rng=random.Random(21))
+        start = game.zobrist
+        for _ in range(300):
+            dice = game.roll_dice()
+            moves = game.legal_moves(game.current_turn, dice)
+            if moves:
+                game.play(moves[0])
+            else:
+                game.pass_turn()
+            self.assertEqual(game.zobrist, game.compute_zobrist())
+        while game.undo():
+            pass
+        game.dice_value = None
+        self.assertEqual(game.zobrist, start)
+
+    def test_same_position_same_hash(self):
+        a, b = LudoGame(players_count=2), LudoGame(players_count=2)
+        self.assertEqual(a.zobrist, b.zobrist)
+        a.dice_value = 6
+        self.assertNotEqual(a.zobrist, b.zobrist)
+        a.move_token(0, 1)
+        b.players[0].tokens[0].state, b.players[0].tokens[0].ring_rel = "ring", 0
+        b.rebuild_index()
+        self.assertEqual(a.zobrist, b.zobrist)
+
+class TestBinaryFormat(unittest.TestCase):
+    def positions(self):
+        import random
+        rng = random.Random(8)
+        for players in (2, 3, 4):
+            game = LudoGame(players, rng=random.Random(players))
+            for _ in range(300):
+                moves = game.legal_moves(game.current_turn, game.roll_dice())
+                if moves:
+                    game.play(rng.choice(moves))
+                else:
+                    game.pass_turn()
+                if game.winner_index() is not None:
+                    break
+                yield game
+
+    def test_round_trips_with_json_form(self):
+        for game in self.positions():
+            data = game.to_bytes()
+            back = LudoGame.from_bytes(data)
+            self.assertEqual(back.to_dict(), game.to_dict())
+            self.assertEqual(back.zobrist, game.zobrist)
+            self.assertEqual(LudoGame.from_dict(game.to_dict()).to_bytes(), data)
+        self.assertEqual(len(LudoGame(2).to_bytes()), 19)
+        self.assertEqual(len(LudoGame(4).to_bytes()), 29)
+
+    def test_custom_players_and_odd_tokens(self):
+        from ludo import Token
+        game = LudoGame(3)
+        game.players[1].name = "Grüne"
+        game.players[1].color = (1, 2, 3)
+        game.players[2].tokens = [Token(7, "ring", 5), Token(2, "home", -1, 3)]
+        game.players[0].tokens[0].ring_rel = 9      # stray field on a base token
+        game.rebuild_index()
+        back = LudoGame.from_bytes(game.to_bytes(journal=12))
+        self.assertEqual(back.to_dict(), game.to_dict())
+        self.assertEqual(LudoGame(2).set_bytes(game.to_bytes(journal=12)), 12)
+
+    def test_rejects_garbage(self):
+        with self.assertRaises(ValueError):
+            LudoGame.from_bytes(b"LUDO\x09")
+        with self.assertRaises(ValueError):
+            LudoGame.from_bytes(LudoGame(4).to_bytes()[:-3])
+        good = LudoGame(2).to_bytes()
+        game = LudoGame(3)
+        before = (game.to_dict(), game.zobrist)
+        for header in (good[:5], good[:8]):
+            with self.assertRaises(ValueError):
+                game.set_bytes(header)
+        for at, value in ((6, 1), (6, 5), (7, 2), (7, 4), (8, 7)):     # count, turn, dice
+            with self.assertRaises(ValueError):
+                game.set_bytes(good[:at] + bytes((value,)) + good[at + 1:])
+        from ludo import Token
+        for token in (Token(1, "ring", 52), Token(1, "home", -1, 5), Token(1, 9)):
+            odd = LudoGame(2)
+            odd.players[0].tokens = [token]
+            with self.assertRaises(ValueError):
+                game.set_bytes(odd.to_bytes())
+        self.assertEqual((game.to_dict(), game.zobrist), before)
+
+    def test_save_load_by_extension(self):
+        import os
+        import tempfile
+        game = next(iter(self.positions()))
+        with tempfile.TemporaryDirectory() as d:
+            for name in ("g.ludo", "g.json"):
+                path = os.path.join(d, name)
+                game.save(path)
+                loaded = LudoGame(2)
+                self.assertTrue(loaded.load(path))
+                self.assertEqual(loaded.to_dict(), game.to_dict())
+            with open(os.path.join(d, "g.ludo"), "rb") as f:
+                self.assertEqual(f.read(), game.to_bytes())
+
 if __name__ == "__main__":
     unittest.main()
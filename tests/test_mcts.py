@@ -0,0 +1,58 @@
+import random
+import unittest
+from ludo import LudoGame
+from ludo_mcts import MCTSBot
+
+def midgame(seed, players=4, plies=80):
+    g = LudoGame(players, rng=random.Random(seed))
+    for _ in range(plies):
+        moves = g.legal_moves(g.current_turn, g.roll_dice())
+        g.play(g.rng.choice(moves)) if moves else g.pass_turn()
+    while not g.legal_moves(g.current_turn, g.roll_dice())[1:]:
+        g.pass_turn()
+    return g
+
+class TestMCTS(unittest.TestCase):
+    def test_returns_legal_move_and_leaves_game_untouched(self):
+        g = midgame(1)
+        before = g.to_dict()
+        bot = MCTSBot(iterations=200, seed=1)
+        move = bot.choose_move(g)
+        self.assertIn(move, g.legal_moves(g.current_turn, g.dice_value))
+        self.assertEqual(g.to_dict(), before)
+        self.assertEqual(bot.playouts, 200)
+        self.assertEqual(sum(bot._root.n), 200)
+        forced = LudoGame(2)
+        forced.dice_value = 6
+        forced.players[0].tokens = forced.players[0].tokens[:1]    # one token: one move
+        forced.rebuild_index()
+        self.assertIsNotNone(bot.choose_move(forced))
+        self.assertEqual((bot.playouts, bot.elapsed, bot.playouts_per_sec), (0, 0.0, 0.0))
+
+    def test_subtree_reuse(self):
+        g = midgame(2, players=2)
+        bot = MCTSBot(iterations=300, seed=2)
+        bot.choose_move(g)
+        root = bot._root
+        bot.choose_move(g)
+        self.assertIs(bot._root, root)
+        self.assertEqual(sum(root.n), 600)
+        # the node for a position reached below the root is found again
+        i = next(i for i, c in enumerate(root.children) if c is not None and c.children)
+        dice, node = next(iter(root.children[i].children.items()))
+        g.play(g.legal_moves(g.current_turn, g.dice_value)[i])
+        g.dice_value = dice
+        self.assertIs(bot._reuse_root(g), node)
+
+    def test_root_parallel(self):
+        g = midgame(3)
+        bot = MCTSBot(iterations=50, workers=2, seed=3)
+        try:
+            move = bot.choose_move(g)
+        finally:
+            bot.close()
+        self.assertIn(move, g.legal_moves(g.current_turn, g.dice_value))
+        self.assertEqual(bot.playouts, 100)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import unittest
+from ludo import JSON_SCHEMA, LudoGame, SEATS, json_schema, upgrade_save
+from ludo_migrate import CURRENT, FAILED, UPGRADED, migrate
+
+LEGACY = {"players": [
+    {"name": "Player 1", "idx": 0, "color": "red", "tokens": [
+        {"pos": -1, "completed": False}, {"pos": 5, "completed": False},
+        {"pos": 54, "completed": False}, {"pos": 56, "completed": True}]},
+    {"name": "Player 2", "idx": 1, "color": "green", "tokens": [
+        {"pos": -1, "completed": False}] * 4}],
+    "current_turn": 1}
+
+class TestMigrate(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, rel, data):
+        path = os.path.join(self.dir.name, "in", rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+        return path
+
+    def test_upgrade_legacy_schema(self):
+        self.assertEqual(json_schema(LEGACY), 1)
+        game = LudoGame(4)
+        game.set_state(LEGACY)
+        self.assertEqual(json_schema(game.to_dict()), JSON_SCHEMA)
+        red, green = game.players
+        self.assertEqual((red.name, red.color, green.entry_global), ("Player 1", SEATS[0][1], 13))
+        self.assertEqual([t.progress for t in red.tokens], [-1, 5, 54, 57])
+        self.assertEqual(game.current_turn, 1)
+        self.assertEqual(game.occupants(5), [(0, red.tokens[1])])
+        self.assertEqual(upgrade_save(game.to_dict()), game.to_dict())
+
+    def test_load_legacy_file(self):
+        game = LudoGame(4)
+        self.assertTrue(game.load(self.write("ludo_save.json", LEGACY)))
+        self.assertEqual(len(game.players), 2)
+        with self.assertRaises(ValueError):
+            game.set_state({"players": [{"idx": 0, "color": "purple", "tokens": []}]})
+        before = game.to_dict()
+        for corrupt in ({"players": [{"name": "x"}]},
+                        {"players": [{"name": "x", "color": 3, "entry_global": 0, "tokens": []}]},
+                        dict(game.to_dict(), current_turn=7),
+                        {"players": [{"name": "x", "color": [1, 2, 3], "entry_global": 0,
+                                      "tokens": [{"id": 1, "state": "ring", "ring_rel": 70}]}]},
+                        {"players": [{"name": "x", "color": [1, 2, 3], "entry_global": 0,
+                                      "tokens": [{"id": 9, "state": "base"}]}]}):
+            with self.assertRaises(ValueError):
+                game.set_state(corrupt)
+        self.assertEqual(game.to_dict(), before)
+
+    def test_bulk_convert_reports_failures(self):
+        self.write("a.json", LEGACY)
+        self.write("deep/er/b.json", LEGACY)
+        self.write("c.json", LudoGame(3).to_dict())
+        bad = self.write("deep/bad.json", "{not json")
+        self.write("deep/noname.json", {"players": [{"name": "x"}]})
+        self.write("notes.txt", "ignored")
+        out = os.path.join(self.dir.name, "out")
+        results = {os.path.basename(src): (outcome, detail)
+                   for src, outcome, detail in migrate([os.path.join(self.dir.name, "in")], out,
+                                                       workers=2, in_flight=1)}
+        self.assertEqual({k: v[0] for k, v in results.items()},
+                         {"a.json": UPGRADED, "b.json": UPGRADED, "c.json": CURRENT,
+                          "bad.json": FAILED, "noname.json": FAILED})
+        converted = LudoGame(2)
+        self.assertTrue(converted.load(os.path.join(out, "deep", "er", "b.json")))
+        with open(os.path.join(out, "deep", "er", "b.json")) as f:
+            self.assertEqual(json_schema(json.load(f)), JSON_SCHEMA)
+        self.assertFalse(os.path.exists(os.path.join(out, "deep", "bad.json")))
+        self.assertTrue(os.path.exists(bad))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import io
+import random
+import unittest
+from ludo import LudoGame
+from ludo_replay import ReplayLog, ReplayWriter
+from ludo_sim import POLICIES, play_game, replay_game, simulate
+
+def live_positions(game, rng, plies):
+    """Play `plies` plies through the history API; returns the to_dict()
+    after each, starting with ply 0."""
+    out = [game.to_dict()]
+    for _ in range(plies):
+        if game.winner_index() is not None:
+            break
+        moves = game.legal_moves(game.current_turn, game.roll_dice())
+        if moves:
+            game.play(rng.choice(moves))
+        else:
+            game.pass_turn()
+        out.append(game.to_dict())
+    return out
+
+class TestReplay(unittest.TestCase):
+    def test_seek_matches_live_game(self):
+        f = io.BytesIO()
+        writer = ReplayWriter(f, keyframe_every=16)
+        game = LudoGame(4, rng=random.Random(3))
+        writer.attach(game, seed=3)
+        expected = live_positions(game, random.Random(4), 200)
+        writer.end_game(game.winner_index())
+        self.assertIsNone(game.journal)
+        log = ReplayLog(f.getvalue())
+        self.assertEqual(len(log), 1)
+        self.assertEqual(log.index[0].seed, 3)
+        self.assertEqual(log.index[0].plies, len(expected) - 1)
+        self.assertGreater(len(log.index[0].keyframes), 10)
+        for ply in (0, 1, 15, 16, 17, 100, len(expected) - 1):
+            self.assertEqual(log.position(0, ply, verify=True).to_dict(), expected[ply])
+
+    def test_undo_is_logged_as_keyframe(self):
+        f = io.BytesIO()
+        writer = ReplayWriter(f)
+        game = LudoGame(2, rng=random.Random(8))
+        writer.attach(game)
+        live_positions(game, random.Random(1), 30)
+        game.undo()
+        live_positions(game, random.Random(2), 10)
+        writer.end_game(None)
+        self.assertEqual(ReplayLog(f.getvalue()).position(0).to_dict(), game.to_dict())
+
+    def test_save_with_writer_attached(self):
+        import os
+        import tempfile
+        game = LudoGame(2, rng=random.Random(5))
+        ReplayWriter(io.BytesIO()).attach(game)
+        live_positions(game, random.Random(6), 20)
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "g.json")
+            game.save(path)
+            loaded = LudoGame(2)
+            self.assertTrue(loaded.load(path))
+        self.assertEqual(loaded.to_dict(), game.to_dict())
+
+    def test_simulated_batch(self):
+        f = io.BytesIO()
+        stats = simulate(40, players=3, seed=11, log=ReplayWriter(f, keyframe_every=8))
+        log = ReplayLog(f.getvalue())
+        self.assertEqual(len(log), stats.games)
+        for i in (0, 21, 39):
+            final, winner, turns = replay_game(11, i, players=3)
+            self.assertEqual(log.index[i].winner, winner)
+            self.assertEqual(log.index[i].plies, turns)
+            replayed = log.position(i, verify=True)
+            self.assertEqual(replayed.to_dict(), final.to_dict())
+            self.assertEqual(replayed.zobrist, final.zobrist)
+
+    def test_logging_does_not_change_the_game(self):
+        a = LudoGame(4, rng=random.Random(6))
+        b = LudoGame(4, rng=random.Random(6))
+        seats = [0] * 4
+        plain = play_game(a, POLICIES["random"], 10_000, seats)
+        logged = play_game(b, POLICIES["random"], 10_000, seats, ReplayWriter(io.BytesIO()))
+        self.assertEqual(plain, logged)
+        self.assertEqual(a.to_dict(), b.to_dict())
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            ReplayLog(b"LUDO\x01\x00\x02")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import random
+import unittest
+from ludo_sim import simulate, simulate_parallel, replay_game, play_game, policy_first
+from ludo import LudoGame
+
+class TestSimulator(unittest.TestCase):
+    def test_games_finish_and_are_counted(self):
+        random.seed(7)
+        stats = simulate(50, players=4, policy="random")
+        self.assertEqual(stats.games, 50)
+        self.assertEqual(sum(stats.wins) + stats.unfinished, 50)
+        self.assertEqual(sum(stats.lengths.values()), 50)
+
+    def test_play_game_reuses_tokens(self):
+        random.seed(3)
+        game = LudoGame(players_count=2)
+        tokens = [t for p in game.players for t in p.tokens]
+        seat_turns = [0, 0]
+        winner, turns = play_game(game, policy_first, 10_000, seat_turns)
+        self.assertIsNotNone(winner)
+        self.assertEqual(sum(seat_turns), turns)
+        self.assertTrue(all(a is b for a, b in zip(tokens, [t for p in game.players for t in p.tokens])))
+
+    def test_parallel_matches_serial_with_seed(self):
+        serial = simulate(40, players=3, seed=11)
+        parallel = simulate_parallel(40, players=3, seed=11, workers=2)
+        self.assertEqual(serial.wins, parallel.wins)
+        self.assertEqual(serial.lengths, parallel.lengths)
+
+    def test_replay_single_game(self):
+        one = simulate(1, players=4, seed=99, first_index=5)
+        _, winner, turns = replay_game(99, 5, players=4)
+        self.assertEqual(one.wins[winner], 1)
+        self.assertEqual(one.lengths, {turns: 1})
+
+if __name__ == "__main__":
+    unittest.main()
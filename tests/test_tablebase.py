@@ -0,0 +1,86 @@
+import os
+import random
+import tempfile
+import unittest
+from ludo import LudoGame, PROGRESS_FIELDS, STATE_NAMES
+from ludo_tablebase import Tablebase, all_sets, build, children, rank, set_count
+
+def position(red, green, turn=0, dice=None):
+    """2-player game whose unfinished tokens have the given progress."""
+    players = []
+    for i, side in enumerate((red, green)):
+        progress = list(side) + [57] * (4 - len(side))
+        tokens = []
+        for j, p in enumerate(progress):
+            code, ring_rel, home_idx = PROGRESS_FIELDS[p + 1]
+            tokens.append({"id": j + 1, "state": STATE_NAMES[code],
+                           "ring_rel": ring_rel, "home_idx": home_idx})
+        players.append(dict(LudoGame(2).players[i].to_dict(), tokens=tokens))
+    game = LudoGame(2)
+    game.set_state({"current_turn": turn, "dice_value": dice, "players": players})
+    return game
+
+def sides(game):
+    return tuple(tuple(sorted(t.progress for t in p.tokens if t.progress != 57))
+                 for p in game.players)
+
+class TestTablebase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.dir.name, "tb1.ltb")
+        build(cls.path, tokens=1)
+        cls.tb = Tablebase(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tb.close()
+        cls.dir.cleanup()
+
+    def test_perfect_hash(self):
+        sets = all_sets(2)
+        self.assertEqual(len(sets), set_count(2))
+        self.assertEqual(len(set(sets)), len(sets))
+        self.assertTrue(all(rank(s) == i for i, s in enumerate(sets)))
+
+    def test_rules_match_engine(self):
+        rng = random.Random(3)
+        values = list(range(-1, 57))
+        for _ in range(400):
+            red = sorted(rng.choice(values) for _ in range(rng.randint(1, 2)))
+            green = sorted(rng.choice(values) for _ in range(rng.randint(1, 2)))
+            seat = rng.randrange(2)
+            dice = rng.randint(1, 6)
+            game = position(red, green, seat, dice)
+            own, opp = sides(game)[seat], sides(game)[1 - seat]
+            expected = set()
+            for m in game.legal_moves(seat, dice):
+                record = game.make_move(m)
+                after = sides(game)
+                game.undo_move(record)
+                expected.add((m.src, after[seat], after[1 - seat]))
+            self.assertEqual(set(children(own, opp, seat, dice)), expected)
+
+    def test_values_satisfy_bellman_equation(self):
+        tb = self.tb
+        sets = [s for s in all_sets(1) if s]
+        rng = random.Random(5)
+        for _ in range(500):
+            seat, own, opp = rng.randrange(2), rng.choice(sets), rng.choice(sets)
+            red, green = (own, opp) if seat == 0 else (opp, own)
+            rolled = [tb.win_probability(position(red, green, seat, d)) for d in range(1, 7)]
+            v = tb.win_probability(position(red, green, seat))
+            self.assertAlmostEqual(v, sum(rolled) / 6, delta=3 / 65535)
+
+    def test_lookup(self):
+        tb = self.tb
+        game = position([56], [-1], 0, 1)
+        self.assertEqual(tb.win_probability(game), 1.0)
+        self.assertEqual(tb.best_move(game).dst, 57)
+        self.assertGreater(tb.win_probability(position([56], [-1])), 0.9)
+        self.assertIsNone(tb.win_probability(position([1, 2], [-1])))
+        self.assertIsNone(tb.win_probability(LudoGame(3)))
+        self.assertIsNone(tb.best_move(position([5], [9])))      # dice not rolled
+
+if __name__ == "__main__":
+    unittest.main()
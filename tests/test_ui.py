@@ -0,0 +1,177 @@
+import os
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+try:
+    import pygame
+except ImportError:  # the UI's only dependency
+    pygame = None
+
+from ludo import LudoGame
+
+@unittest.skipIf(pygame is None, "pygame not installed")
+class TestTextCache(unittest.TestCase):
+    def setUp(self):
+        pygame.font.init()
+        self.font = pygame.font.Font(None, 18)
+
+    def test_lru_eviction_and_stats(self):
+        from ui_pygame import TextCache
+        cache = TextCache(maxsize=2)
+        first = cache.render(self.font, "a", (0, 0, 0))
+        self.assertIs(cache.render(self.font, "a", (0, 0, 0)), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.render(self.font, "b", (0, 0, 0))
+        cache.render(self.font, "a", (0, 0, 0))         # now most recent
+        cache.render(self.font, "c", (0, 0, 0))         # evicts "b"
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.render(self.font, "a", (0, 0, 0)), first)
+        cache.reset_stats()
+        cache.render(self.font, "b", (0, 0, 0))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertIsNot(cache.render(self.font, "a", (0, 0, 1)), first)   # colour is in the key
+
+    def test_maxsize_zero_disables_caching(self):
+        from ui_pygame import TextCache
+        cache = TextCache(maxsize=0)
+        a = cache.render(self.font, "a", (0, 0, 0))
+        self.assertIsNot(cache.render(self.font, "a", (0, 0, 0)), a)
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 2))
+
+def old_token_pos(p_idx, entry_global, token):
+    """UI._token_pos_screen before the position tables, for reference."""
+    from ludo import HOME_LEN, RING_LEN
+    from ui_pygame import (BASE_DICE_CENTERS, CELL, MARGIN_X, MARGIN_Y, TOKEN_SLOT_OFFSETS,
+                           _grid_point, home_point_global, ring_point_global)
+    if token.state == "base":
+        gx, gy = BASE_DICE_CENTERS[p_idx]
+        ox, oy = TOKEN_SLOT_OFFSETS[(token.id-1) % 4]
+        return _grid_point(gx + ox, gy + oy)
+    if token.state == "ring":
+        return ring_point_global((entry_global + token.ring_rel) % RING_LEN)
+    if token.state == "home":
+        return home_point_global(p_idx, max(0, min(HOME_LEN-1, token.home_idx)))
+    return (MARGIN_X + 7*CELL, MARGIN_Y + 7*CELL)
+
+@unittest.skipIf(pygame is None, "pygame not installed")
+class TestPositionTables(unittest.TestCase):
+    def test_match_the_old_formula(self):
+        from ludo import FINISH_PROGRESS, PROGRESS_FIELDS, SEATS, Token
+        from ui_pygame import seat_positions, token_slot
+        for seat, (_, _, entry) in enumerate(SEATS):
+            table = seat_positions(seat, entry)
+            for progress in range(-1, FINISH_PROGRESS + 1):
+                for token_id in range(1, 5):
+                    token = Token(token_id, *PROGRESS_FIELDS[progress + 1])
+                    self.assertEqual(table[token_slot(token)], old_token_pos(seat, entry, token),
+                                     (seat, progress, token_id))
+
+@unittest.skipIf(pygame is None, "pygame not installed")
+class TestDirtyRendering(unittest.TestCase):
+    def test_render_matches_full_draw(self):
+        import random
+        from ui_pygame import UI, W, H
+        pygame.display.init()
+        screen = pygame.display.set_mode((W, H))
+        reference = pygame.Surface((W, H), 0, screen)
+        game = LudoGame(3, rng=random.Random(4))
+        dirty, full = UI(game), UI(game)
+        rng = random.Random(5)
+        dirty.render(screen)
+        for step in range(40):
+            if step == 30:
+                game.undo()
+            elif game.dice_value is None:
+                game.roll_dice()
+            else:
+                moves = game.legal_moves(game.current_turn, game.dice_value)
+                if moves:
+                    game.play(rng.choice(moves))
+                else:
+                    game.pass_turn()
+            before = screen.copy()
+            rects = dirty.render(screen)
+            full.draw(reference)
+            self.assertEqual(pygame.image.tostring(screen, "RGB"),
+                             pygame.image.tostring(reference, "RGB"), step)
+            for r in rects:             # every changed pixel lies in a returned rect
+                before.fill((1, 2, 3), r)
+                reference.fill((1, 2, 3), r)
+            self.assertEqual(pygame.image.tostring(before, "RGB"),
+                             pygame.image.tostring(reference, "RGB"), step)
+        pygame.display.quit()
+
+@unittest.skipIf(pygame is None, "pygame not installed")
+class TestFrameProfiler(unittest.TestCase):
+    def test_rows_are_bounded_unless_kept(self):
+        from ui_profile import FrameProfiler
+        bounded, kept = FrameProfiler(window=4, max_rows=5), FrameProfiler(keep_all=True)
+        for prof in (bounded, kept):
+            for _ in range(20):
+                prof.begin()
+                prof.add("board", 0.001)
+                prof.end()
+        self.assertEqual((bounded.frames, len(bounded.rows)), (20, 5))
+        self.assertEqual((kept.frames, len(kept.rows)), (20, 20))
+        self.assertEqual(len(bounded.samples["board"]), 4)
+        self.assertAlmostEqual(bounded.percentiles("board")[0], 1.0)
+
+@unittest.skipIf(pygame is None, "pygame not installed")
+class TestHitIndex(unittest.TestCase):
+    def test_priority_and_remove(self):
+        from ui_pygame import HIT_BUTTON, HIT_MOVABLE, HIT_TOKEN, HitIndex
+        hits = HitIndex()
+        hits.add_circle("token", (100, 100), 18, HIT_TOKEN, "token", order=9)
+        hits.add_circle("movable", (104, 100), 18, HIT_MOVABLE, "movable", order=0)
+        hits.add("button", pygame.Rect(90, 90, 30, 30), HIT_BUTTON, "button")
+        self.assertEqual(hits.query((101, 101)), "button")
+        hits.remove("button")
+        self.assertNotIn("button", hits)
+        self.assertEqual(hits.query((101, 101)), "movable")
+        hits.remove("movable")
+        self.assertEqual(hits.query((101, 101)), "token")
+        hits.add("button", pygame.Rect(90, 90, 30, 30), HIT_BUTTON, "button")
+        self.assertEqual(hits.query((101, 101)), "button")
+        self.assertIsNone(hits.query((300, 300)))
+
+    def test_draw_order_breaks_ties(self):
+        from ui_pygame import HIT_TOKEN, HitIndex
+        hits = HitIndex()
+        hits.add_circle("under", (100, 100), 18, HIT_TOKEN, "under", order=3)
+        hits.add_circle("over", (100, 100), 18, HIT_TOKEN, "over", order=5)
+        self.assertEqual(hits.query((100, 100)), "over")
+        hits.add_circle("over", (200, 200), 18, HIT_TOKEN, "over", order=5)   # re-filed
+        self.assertEqual(hits.query((100, 100)), "under")
+        self.assertEqual(hits.query((200, 200)), "over")
+
+    def test_click_follows_moved_token(self):
+        from ui_pygame import UI, token_slot
+        game = LudoGame(2)
+        ui = UI(game)
+        red = game.players[0]
+        game.dice_value = 6
+        game.awaiting_move = True
+        table = ui._position_tables()[0]
+        base = table[token_slot(red.tokens[0])]
+        self.assertEqual(ui.click(base), "move:1")
+        game.play(game.legal_moves(0, 6)[0])
+        game.dice_value = 2                 # Red rolled a 6: Red again
+        self.assertEqual(ui.click(base), "")
+        self.assertEqual(ui.click(table[token_slot(red.tokens[0])]), "move:1")
+        self.assertEqual(ui.click(ui.btn_roll.rect.center), "roll")
+
+    def test_stacked_tokens_pick_the_top_one(self):
+        from ui_pygame import UI, token_slot
+        game = LudoGame(2)
+        red = game.players[0]
+        for t in red.tokens[:2]:
+            t.state, t.ring_rel = "ring", 5
+        game.rebuild_index()
+        game.dice_value = 1
+        game.awaiting_move = True
+        ui = UI(game)
+        pos = ui._position_tables()[0][token_slot(red.tokens[0])]
+        self.assertEqual(ui.click(pos), "move:2")        # drawn last, on top
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+
+try:
+    import numpy  # noqa: F401
+except ImportError:  # optional dependency
+    numpy = None
+
+@unittest.skipIf(numpy is None, "numpy not installed")
+class TestVecEngine(unittest.TestCase):
+    def test_agrees_with_object_engine(self):
+        from ludo_vec import check_against_object_engine
+        self.assertGreater(check_against_object_engine(16, players=4, policy="random", seed=5), 0)
+        self.assertGreater(check_against_object_engine(8, players=2, policy="first", seed=6), 0)
+
+    def test_simulate_vec_counts_every_game(self):
+        from ludo_vec import simulate_vec
+        stats = simulate_vec(100, batch=32, players=3, seed=2)
+        self.assertEqual(stats.games, 100)
+        self.assertEqual(sum(stats.wins) + stats.unfinished, 100)
+
+if __name__ == "__main__":
+    unittest.main()
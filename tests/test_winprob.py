@@ -0,0 +1,93 @@
+import random
+import time
+import unittest
+from ludo import LudoGame
+from ludo_winprob import (EstimateCache, WinProbService, estimate, estimate_win_probabilities,
+                          position_key)
+
+def endgame():
+    """Red needs a 1 with its last token; Green has everything in base."""
+    game = LudoGame(2, rng=random.Random(1))
+    red, green = game.players
+    for t in red.tokens:
+        t.state = "finished"
+    red.tokens[3].state = "home"
+    red.tokens[3].home_idx = 4
+    game.rebuild_index()
+    return game
+
+class TestWinProb(unittest.TestCase):
+    def test_key_ignores_token_ids(self):
+        a, b = endgame(), endgame()
+        b.players[0].tokens.reverse()
+        self.assertEqual(position_key(a), position_key(b))
+        b.roll_dice()
+        self.assertNotEqual(position_key(a), position_key(b))
+
+    def test_estimate_converges_and_is_cached(self):
+        game = endgame()
+        before = game.to_dict()
+        cache = EstimateCache(maxsize=2)
+        est = estimate(game, half_width=0.03, batch=32, cache=cache, rng=random.Random(2))
+        self.assertLessEqual(est.half_width(), 0.03)
+        self.assertGreater(est.probabilities[0], 0.8)
+        self.assertAlmostEqual(sum(est.probabilities), 1.0)
+        self.assertEqual(game.to_dict(), before)
+        n = est.rollouts
+        again = estimate(game, half_width=0.03, cache=cache)
+        self.assertIs(again, est)
+        self.assertEqual((again.rollouts, cache.hits), (n, 1))
+        finer = estimate(game, half_width=0.02, cache=cache, rng=random.Random(3))
+        self.assertGreater(finer.rollouts, n)            # refined, not restarted
+        for seed in range(3):
+            estimate(LudoGame(2, rng=random.Random(seed)), half_width=0.2, cache=cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_finished_game_is_exact(self):
+        game = endgame()
+        game.players[0].tokens[3].state = "finished"
+        self.assertEqual(estimate_win_probabilities(game, cache=None), [1.0, 0.0])
+
+    def test_max_rollouts(self):
+        est = estimate(LudoGame(4), half_width=0.001, batch=10, max_rollouts=25, cache=None)
+        self.assertEqual(est.rollouts, 25)
+
+    def test_concurrent_refines_lose_nothing(self):
+        import threading
+        from ludo_winprob import refine
+        est = estimate(endgame(), max_rollouts=0, cache=None)
+        seen = []
+
+        def work(seed):
+            g, rng = endgame(), random.Random(seed)
+            for _ in range(20):
+                refine(g, est, 5, rng)
+                wins, n = est.counts
+                seen.append(sum(wins) <= n)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(est.rollouts, 4 * 20 * 5)
+        self.assertTrue(all(seen))
+        self.assertAlmostEqual(sum(est.probabilities), 1.0)
+
+    def test_service(self):
+        updates = []
+        service = WinProbService(half_width=0.05, cache=EstimateCache(),
+                                 on_update=lambda: updates.append(1), seed=4)
+        game = endgame()
+        service.request(game)
+        deadline = time.time() + 10
+        while time.time() < deadline and not (
+                service.result(game) and service.result(game).half_width() <= 0.05):
+            time.sleep(0.01)
+        self.assertGreater(service.result(game).probabilities[0], 0.8)
+        self.assertTrue(updates)
+        self.assertIsNone(service.result(LudoGame(2)))
+        service.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# ui_profile.py
+"""Per-phase frame timing for the pygame UI.
+
+main.py brackets each frame with begin()/end() and times event handling
+and presenting (display.flip/update); UI.draw adds the board, panel and
+token phases. The overlay shows rolling p50/p95/p99 per phase over the
+last `window` frames plus the frame rate; dump_csv() writes one row per
+frame for comparing builds. Only the last `max_rows` frames are kept for
+it unless `keep_all` is set, which LUDO_PROFILE_CSV does so that the dump
+on exit covers the whole session.
+
+    LUDO_PROFILE=1 python main.py                 # overlay on from the start
+    LUDO_PROFILE_CSV=frames.csv python main.py    # also dump on exit
+F3 toggles the overlay, F4 dumps the CSV.
+"""
+import csv
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple, Union
+
+import pygame
+
+PHASES = ("events", "board", "panel", "tokens", "present")
+DEFAULT_CSV = "frame_times.csv"
+
+class FrameProfiler:
+    def __init__(self, window: int = 240, visible: bool = True,
+                 csv_path: Optional[str] = None, max_rows: int = 10_000, keep_all: bool = False):
+        self.window = window
+        self.visible = visible
+        self.csv_path = csv_path or DEFAULT_CSV
+        self.samples: Dict[str, deque] = {p: deque(maxlen=window) for p in PHASES + ("frame",)}
+        # (t, *PHASES ms, frame ms) per frame
+        self.rows: Union[List[Tuple[float, ...]], Deque[Tuple[float, ...]]] = \
+            [] if keep_all else deque(maxlen=max_rows)
+        self.frames = 0
+        self._stamps: deque = deque(maxlen=window)
+        self._cur = dict.fromkeys(PHASES, 0.0)
+        self._start = 0.0
+        self._t0 = time.perf_counter()
+        self._panel: Optional[pygame.Surface] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["FrameProfiler"]:
+        """A profiler if LUDO_PROFILE or LUDO_PROFILE_CSV is set, else None."""
+        csv_path = os.environ.get("LUDO_PROFILE_CSV")
+        if not os.environ.get("LUDO_PROFILE") and not csv_path:
+            return None
+        return cls(visible=bool(os.environ.get("LUDO_PROFILE")), csv_path=csv_path,
+                   keep_all=bool(csv_path))
+
+    # ----------------- Recording -----------------
+    def begin(self):
+        self._start = time.perf_counter()
+        for p in PHASES:
+            self._cur[p] = 0.0
+
+    def add(self, phase: str, seconds: float):
+        self._cur[phase] += seconds * 1000.0
+
+    def end(self):
+        now = time.perf_counter()
+        total = (now - self._start) * 1000.0
+        cur = self._cur
+        for p in PHASES:
+            self.samples[p].append(cur[p])
+        self.samples["frame"].append(total)
+        self._stamps.append(now)
+        self.frames += 1
+        self.rows.append((now - self._t0,) + tuple(cur[p] for p in PHASES) + (total,))
+
+    # ----------------- Statistics -----------------
+    def percentiles(self, phase: str) -> Tuple[float, float, float]:
+        data = sorted(self.samples[phase])
+        if not data:
+            return (0.0, 0.0, 0.0)
+        n = len(data)
+        return (data[n // 2], data[min(n - 1, int(n * 0.95))], data[min(n - 1, int(n * 0.99))])
+
+    def fps(self) -> float:
+        s = self._stamps
+        if len(s) < 2 or s[-1] == s[0]:
+            return 0.0
+        return (len(s) - 1) / (s[-1] - s[0])
+
+    def dump_csv(self, path: Optional[str] = None) -> str:
+        path = path or self.csv_path
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(("t_s",) + tuple(f"{p}_ms" for p in PHASES) + ("frame_ms",))
+            for row in self.rows:
+                w.writerow(tuple(f"{x:.4f}" for x in row))
+        return path
+
+    # ----------------- Overlay -----------------
+    def overlay_rect(self, screen_w: int) -> pygame.Rect:
+        return pygame.Rect(screen_w - 250, 36, 240, 20 * (len(PHASES) + 3))
+
+    def draw(self, screen: pygame.Surface, font: pygame.font.Font):
+        """Draw the stats box. The numbers change every frame, so they are
+        rendered directly rather than through the UI's text cache."""
+        rect = self.overlay_rect(screen.get_width())
+        if self._panel is None or self._panel.get_size() != rect.size:
+            self._panel = pygame.Surface(rect.size)
+            self._panel.set_alpha(200)
+        self._panel.fill((20, 20, 30))
+        screen.blit(self._panel, rect.topleft)
+        lines = [f"FPS {self.fps():5.1f}   frames {self.frames}",
+                 f"{'ms':<8}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for p in PHASES + ("frame",):
+            p50, p95, p99 = self.percentiles(p)
+            lines.append(f"{p:<8}{p50:>7.2f}{p95:>7.2f}{p99:>7.2f}")
+        y = rect.y + 4
+        for line in lines:
+            screen.blit(font.render(line, True, (230, 230, 230)), (rect.x + 8, y))
+            y += 20
@@ -1,6 +1,9 @@
 import pygame
+import time
+from collections import OrderedDict
 from typing import Tuple, List
-from ludo import RING_LEN, HOME_LEN, SAFE_GLOBAL_INDICES
+from ludo import RING_LEN, SAFE_GLOBAL_INDICES, FINISH_PROGRESS, TOKENS_PER_PLAYER
+from ui_sprites import SpriteAtlas
 
 # Window & layout
 W, H = 900, 700
@@ -22,21 +25,129 @@ PANEL  = (250, 250, 255)
 
 SEAT_COLORS = [RED, GREEN, YELLOW, BLUE]
 
+# Text rendering
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces keyed by
+    (font, text, colour, antialias). `hits`/`misses` count lookups since
+    the last reset_stats(); maxsize=0 disables caching."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._surfs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surf = self._surfs.get(key)
+        if surf is not None:
+            self._surfs.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        if self.maxsize > 0:
+            self._surfs[key] = surf
+            if len(self._surfs) > self.maxsize:
+                self._surfs.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self._surfs.clear()
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._surfs)
+
 # Buttons
 class Button:
     def __init__(self, x, y, w, h, text):
         self.rect = pygame.Rect(x, y, w, h)
         self.text = text
+        self.pressed = False
 
-    def draw(self, surf, font, bg, fg):
+    def draw(self, surf, font, bg, fg, text_cache=None):
+        if self.pressed:
+            bg = (bg[0]*3//4, bg[1]*3//4, bg[2]*3//4)
         pygame.draw.rect(surf, bg, self.rect, border_radius=6)
-        r = font.render(self.text, True, fg)
+        if text_cache is not None:
+            r = text_cache.render(font, self.text, fg)
+        else:
+            r = font.render(self.text, True, fg)
         surf.blit(r, (self.rect.x + (self.rect.w - r.get_width())//2,
                       self.rect.y + (self.rect.h - r.get_height())//2))
 
     def hit(self, pos):
         return self.rect.collidepoint(pos)
 
+# Click hit-testing
+# When shapes overlap, the higher priority wins; within a priority the
+# higher `order` (drawn later, i.e. on top) wins.
+HIT_TOKEN = 0      # any token: occupies space, not clickable by itself
+HIT_MOVABLE = 1    # a token that can move with the current dice
+HIT_WIDGET = 2     # on-board widgets
+HIT_BUTTON = 3
+TOKEN_HIT_RADIUS = 18
+
+class HitIndex:
+    """Grid-bucketed index of clickable shapes (rects, or circles when a
+    radius is given). Each shape is filed under every `cell`-sized bucket
+    its bounding box touches, so query() only looks at one bucket."""
+
+    def __init__(self, cell=CELL):
+        self.cell = cell
+        self._buckets = {}    # (col, row) -> [key, ...]
+        self._entries = {}    # key -> (priority, order, rect, radius, payload, cells)
+
+    def add(self, key, rect, priority, payload, order=0, radius=None):
+        if key in self._entries:
+            self.remove(key)
+        c = self.cell
+        cells = [(col, row)
+                 for col in range(rect.left // c, (rect.right - 1) // c + 1)
+                 for row in range(rect.top // c, (rect.bottom - 1) // c + 1)]
+        for cell in cells:
+            self._buckets.setdefault(cell, []).append(key)
+        self._entries[key] = (priority, order, pygame.Rect(rect), radius, payload, cells)
+
+    def add_circle(self, key, center, radius, priority, payload, order=0):
+        x, y = center
+        self.add(key, pygame.Rect(x - radius, y - radius, 2*radius + 1, 2*radius + 1),
+                 priority, payload, order, radius)
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for cell in entry[5]:
+            bucket = self._buckets[cell]
+            bucket.remove(key)
+            if not bucket:
+                del self._buckets[cell]
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def query(self, pos):
+        """Payload of the top shape under `pos`, or None."""
+        x, y = pos
+        best = None
+        for key in self._buckets.get((x // self.cell, y // self.cell), ()):
+            entry = self._entries[key]
+            priority, order, rect, radius, _, _ = entry
+            if radius is None:
+                if not rect.collidepoint(pos):
+                    continue
+            else:
+                dx, dy = x - rect.centerx, y - rect.centery
+                if dx*dx + dy*dy > radius*radius:
+                    continue
+            if best is None or (priority, order) > (best[0], best[1]):
+                best = entry
+        return None if best is None else best[4]
+
 # Grid calculations
 def _grid_point(cell_x, cell_y):
     return (MARGIN_X + cell_x * CELL + CELL//2, MARGIN_Y + cell_y * CELL + CELL//2)
@@ -77,6 +188,24 @@ def home_point_global(seat: int, idx: int):
     gx, gy = HOME_GRID[seat][idx]
     return _grid_point(gx, gy)
 
+# Screen-position tables: one flat list per seat, indexed by token_slot():
+# 0..3 base slots, then 4 + progress (ring 4..55, home 56..60, finished 61).
+BASE_SLOTS = TOKENS_PER_PLAYER
+SLOTS = BASE_SLOTS + FINISH_PROGRESS + 1
+
+def token_slot(token) -> int:
+    p = token.progress
+    return (token.id - 1) % BASE_SLOTS if p < 0 else BASE_SLOTS + p
+
+def seat_positions(seat: int, entry_global: int) -> List[Tuple[int, int]]:
+    """Screen centre of every slot of `seat`'s track."""
+    gx, gy = BASE_DICE_CENTERS[seat]
+    table = [_grid_point(gx + ox, gy + oy) for ox, oy in TOKEN_SLOT_OFFSETS]
+    table += [ring_point_global(entry_global + rel) for rel in range(RING_LEN)]
+    table += [home_point_global(seat, i) for i in range(FINISH_PROGRESS - RING_LEN)]
+    table.append((MARGIN_X + 7*CELL, MARGIN_Y + 7*CELL))
+    return table
+
 # UI Class
 class UI:
     def __init__(self, game):
@@ -84,24 +213,173 @@ class UI:
         pygame.font.init()
         self.font = pygame.font.SysFont("Arial", 18)
         self.big = pygame.font.SysFont("Arial", 22, bold=True)
+        self.text_cache = TextCache()
 
         bottom_y = H - 70
-        self.btn_roll = Button(40, bottom_y, 120, 40, "Roll Dice")
-        self.btn_add  = Button(180, bottom_y, 120, 40, "+ Player")
-        self.btn_del  = Button(320, bottom_y, 120, 40, "- Player")
-        self.btn_save = Button(460, bottom_y, 120, 40, "Save")
-        self.btn_load = Button(600, bottom_y, 120, 40, "Load")
-        self.btn_quit = Button(740, bottom_y, 120, 40, "Quit")
+        self.btn_roll = Button(20, bottom_y, 110, 40, "Roll Dice")
+        self.btn_undo = Button(142, bottom_y, 110, 40, "Undo")
+        self.btn_add  = Button(264, bottom_y, 110, 40, "+ Player")
+        self.btn_del  = Button(386, bottom_y, 110, 40, "- Player")
+        self.btn_save = Button(508, bottom_y, 110, 40, "Save")
+        self.btn_load = Button(630, bottom_y, 110, 40, "Load")
+        self.btn_quit = Button(752, bottom_y, 110, 40, "Quit")
+        self.buttons = [(self.btn_roll, "roll"), (self.btn_undo, "undo"),
+                        (self.btn_add, "add"), (self.btn_del, "del"),
+                        (self.btn_save, "save"), (self.btn_load, "load"),
+                        (self.btn_quit, "quit")]
+        self.hits = HitIndex()
+        for order, (btn, act) in enumerate(self.buttons):
+            self.hits.add(act, btn.rect, HIT_BUTTON, (act, btn), order)
+        self._token_hits = {}   # (seat, token id) -> (screen pos, movable) as indexed
+        self._hits_key = None
 
         self.highlight = []
+        # The static board is rendered once into an off-screen surface and
+        # blitted each frame; rebuilt when the window size or theme changes.
+        # Themes: "classic" (drawn) and "image" (the board picture).
+        self.theme = "classic"
+        self.cache_board = True
+        self._board_surf = None
+        self._board_key = None
+        self.note = ""   # extra status text, e.g. "(thinking)" for a computer seat
+        # Optional ludo_winprob.WinProbService: its estimate for the current
+        # position is shown above the buttons
+        self.winprob = None
+        # Tokens, highlight rings, dice faces and the image board come from
+        # one pre-scaled atlas (built on the first draw, needs a display)
+        self.sprites = SpriteAtlas()
+        self.use_sprites = True
+        # Optional ui_profile.FrameProfiler: draw() reports its phases to it
+        # and, while visible, draws its overlay last
+        self.profiler = None
+        self._mono = None
+        # Dirty-rectangle mode (render()): what was on screen last time
+        self._last_scene = None
+        self._last_size = None
+        # seat_positions() per seat, rebuilt when the window size or the
+        # seats' entry squares change
+        self._positions = None
+        self._positions_key = None
+        self._size = (W, H)
 
     def draw(self, screen):
-        screen.fill(WHITE)
-        self._draw_board(screen)
+        prof = self.profiler
+        t0 = time.perf_counter() if prof is not None else 0.0
+        self._size = screen.get_size()
+        if self.use_sprites:
+            self.sprites.build(CELL, GRID, SEAT_COLORS, WHITE)
+        if self.cache_board:
+            screen.blit(self._board_surface(screen), (0, 0))
+        else:
+            screen.fill(WHITE)
+            self._draw_board(screen)
+        if prof is None:
+            self._draw_ui_panel(screen)
+            self._draw_tokens(screen)
+            return
+        t1 = time.perf_counter()
         self._draw_ui_panel(screen)
+        t2 = time.perf_counter()
         self._draw_tokens(screen)
+        t3 = time.perf_counter()
+        prof.add("board", t1 - t0)
+        prof.add("panel", t2 - t1)
+        prof.add("tokens", t3 - t2)
+        if prof.visible:
+            if self._mono is None:
+                self._mono = pygame.font.SysFont("monospace", 14)
+            prof.draw(screen, self._mono)
+
+    def render(self, screen):
+        """Dirty-rectangle drawing: redraw only what changed since the last
+        call and return the changed rects for pygame.display.update().
+        Returns [] (and draws nothing) when the scene is unchanged."""
+        scene = self._scene()
+        size = screen.get_size()
+        if self._last_scene is None or size != self._last_size:
+            rects = [screen.get_rect()]
+        else:
+            rects = self._diff(self._last_scene, scene)
+            if self.profiler is not None and self.profiler.visible:
+                rects.append(self.profiler.overlay_rect(size[0]))
+        self._last_scene = scene
+        self._last_size = size
+        if rects:
+            screen.set_clip(rects[0].unionall(rects[1:]))
+            self.draw(screen)
+            screen.set_clip(None)
+        return rects
+
+    def invalidate(self):
+        """Force a full redraw on the next render()."""
+        self._last_scene = None
+
+    def _scene(self):
+        """Everything that can change on screen, keyed by region."""
+        game = self.game
+        tables = self._position_tables()
+        scene = {
+            "labels": tuple((p.name, p.color) for p in game.players),
+            "status": self._status_text(),
+            "winprob": self._winprob_text(),
+        }
+        for btn, act in self.buttons:
+            scene[act] = (btn.pressed, act == "undo" and bool(game.history))
+        hl = set()
+        if game.dice_value is not None:
+            hl = {m.token_id for m in game.legal_moves(game.current_turn, game.dice_value)}
+        for p_idx, p in enumerate(game.players):
+            lit = p_idx == game.current_turn
+            table = tables[p_idx]
+            for t in p.tokens:
+                scene[(p_idx, t.id)] = (table[token_slot(t)], p.color, lit and t.id in hl)
+        return scene
+
+    def _diff(self, old, new):
+        rects = []
+        for key in old.keys() | new.keys():
+            a, b = old.get(key), new.get(key)
+            if a == b:
+                continue
+            if key == "labels":
+                rects.append(pygame.Rect(0, 0, W, 40))
+            elif key == "status":
+                rects.append(pygame.Rect(0, H-140, W, 40))
+            elif key == "winprob":
+                rects.append(pygame.Rect(0, H-100, W, 30))
+            elif isinstance(key, str):
+                rects.append(next(btn.rect for btn, act in self.buttons if act == key))
+            else:
+                for item in (a, b):
+                    if item is not None:
+                        x, y = item[0]
+                        rects.append(pygame.Rect(x - 17, y - 17, 34, 34))
+        return rects
+
+    def release(self):
+        """Mouse button released: un-press any pressed button."""
+        for btn, _ in self.buttons:
+            btn.pressed = False
+
+    def set_theme(self, theme):
+        self.theme = theme
+        self._board_key = None
+        self._last_scene = None
+
+    def _board_surface(self, screen):
+        key = (screen.get_size(), self.theme)
+        if key != self._board_key:
+            surf = pygame.Surface(screen.get_size(), 0, screen)
+            surf.fill(WHITE)
+            self._draw_board(surf)
+            self._board_surf = surf
+            self._board_key = key
+        return self._board_surf
 
     def _draw_board(self, screen):
+        if self.theme == "image" and "board" in self.sprites:
+            self.sprites.blit(screen, "board", (MARGIN_X, MARGIN_Y))
+            return
         # Draw only necessary grid squares (faded background)
         for x in range(GRID):
             for y in range(GRID):
@@ -144,65 +422,121 @@ class UI:
         pygame.draw.polygon(screen, BLUE,   [(cx, cy), (cx-star_len//2, cy+star_len//2), (cx-star_len//2, cy+star_len//2)])
 
     def _draw_tokens(self, screen):
+        tables = self._position_tables()
         for p_idx, p in enumerate(self.game.players):
             color = p.color
-            label = self.big.render(p.name, True, color)
+            label = self.text_cache.render(self.big, p.name, color)
             screen.blit(label, (20 + p_idx*200, 8))
+            table = tables[p_idx]
+            sprite = ("token", color)
+            if self.use_sprites and sprite in self.sprites:
+                for t in p.tokens:
+                    self.sprites.blit(screen, sprite, table[token_slot(t)])
+                continue
             for t in p.tokens:
-                pos = self._token_pos_screen(p_idx, t)
+                pos = table[token_slot(t)]
                 pygame.draw.circle(screen, (100,100,100), (pos[0]+2, pos[1]+2), 11)
                 pygame.draw.circle(screen, color, pos, 10)
 
         # Highlight movable tokens
         self.highlight = []
         if self.game.dice_value is not None:
-            pl = self.game.current_player()
-            p_idx = self.game.players.index(pl)
-            for t in pl.tokens:
-                if t.is_movable_with(self.game.dice_value):
-                    pos = self._token_pos_screen(p_idx, t)
+            p_idx = self.game.current_turn
+            table = tables[p_idx]
+            ring = self.use_sprites and "ring" in self.sprites
+            for move in self.game.legal_moves(p_idx, self.game.dice_value):
+                pos = table[token_slot(move.token)]
+                if ring:
+                    self.sprites.blit(screen, "ring", pos)
+                else:
                     pygame.draw.circle(screen, WHITE, pos, 14, width=3)
-                    self.highlight.append((p_idx, t.id))
+                self.highlight.append(move)
+
+    def _position_tables(self):
+        key = (self._size, tuple(p.entry_global for p in self.game.players))
+        if key != self._positions_key:
+            self._positions = [seat_positions(i, p.entry_global)
+                               for i, p in enumerate(self.game.players)]
+            self._positions_key = key
+        return self._positions
 
     def _token_pos_screen(self, p_idx, token):
-        if token.state == "base":
-            gx, gy = BASE_DICE_CENTERS[p_idx]
-            ox, oy = TOKEN_SLOT_OFFSETS[(token.id-1) % 4]
-            return _grid_point(gx + ox, gy + oy)
-        if token.state == "ring":
-            global_idx = (self.game.players[p_idx].entry_global + token.ring_rel) % RING_LEN
-            return ring_point_global(global_idx)
-        if token.state == "home":
-            idx = max(0, min(HOME_LEN-1, token.home_idx))
-            return home_point_global(p_idx, idx)
-        if token.state == "finished":
-            cx = MARGIN_X + 7*CELL
-            cy = MARGIN_Y + 7*CELL
-            return (cx, cy)
-        return (10,10)
+        # valid after _position_tables() ran for this frame/click
+        return self._positions[p_idx][token_slot(token)]
 
     def _draw_ui_panel(self, screen):
         pygame.draw.rect(screen, PANEL, (0, H-100, W, 100))
-        self.btn_roll.draw(screen, self.big, BLUE, WHITE)
-        self.btn_add.draw(screen, self.font, GRAY, BLACK)
-        self.btn_del.draw(screen, self.font, GRAY, BLACK)
-        self.btn_save.draw(screen, self.font, GRAY, BLACK)
-        self.btn_load.draw(screen, self.font, GRAY, BLACK)
-        self.btn_quit.draw(screen, self.font, RED, WHITE)
-        status = f"Turn: {self.game.current_player().name}   Dice: {self.game.dice_value if self.game.dice_value else '-'}"
-        txt = self.big.render(status, True, BLACK)
+        tc = self.text_cache
+        self.btn_roll.draw(screen, self.big, BLUE, WHITE, tc)
+        self.btn_undo.draw(screen, self.font, GRAY if self.game.history else FADE, BLACK, tc)
+        self.btn_add.draw(screen, self.font, GRAY, BLACK, tc)
+        self.btn_del.draw(screen, self.font, GRAY, BLACK, tc)
+        self.btn_save.draw(screen, self.font, GRAY, BLACK, tc)
+        self.btn_load.draw(screen, self.font, GRAY, BLACK, tc)
+        self.btn_quit.draw(screen, self.font, RED, WHITE, tc)
+        txt = tc.render(self.big, self._status_text(), BLACK)
         screen.blit(txt, (20, H-140))
+        odds = self._winprob_text()
+        if odds:
+            screen.blit(tc.render(self.font, odds, BLACK), (20, H-96))
+        face = ("dice", self.game.dice_value)
+        if self.use_sprites and face in self.sprites:
+            self.sprites.blit(screen, face, (W - 20 - CELL, H-138))
+
+    def _status_text(self):
+        return f"Turn: {self.game.current_player().name}   Dice: {self.game.dice_value if self.game.dice_value else '-'}   {self.note}"
+
+    def _winprob_text(self):
+        if self.winprob is None:
+            return ""
+        est = self.winprob.result(self.game)
+        if est is None:
+            return "Win chances: estimating..."
+        odds = "   ".join(f"{p.name} {100 * q:.0f}%"
+                           for p, q in zip(self.game.players, est.probabilities))
+        margin = "exact" if est.exact else f"\u00b1{100 * est.half_width():.1f}%"
+        return f"Win chances:  {odds}   ({margin})"
+
+    def _sync_hits(self):
+        """Re-file the tokens that moved (or became movable or not) since
+        the last call in the hit index."""
+        game = self.game
+        tables = self._position_tables()
+        key = (game.zobrist, len(game.players), self._positions_key)
+        if key == self._hits_key:
+            return
+        self._hits_key = key
+        movable = set()
+        if game.dice_value is not None:
+            movable = {m.token_id for m in game.legal_moves(game.current_turn, game.dice_value)}
+        seen = set()
+        for p_idx, p in enumerate(game.players):
+            table = tables[p_idx]
+            mine = p_idx == game.current_turn
+            for i, t in enumerate(p.tokens):
+                k = (p_idx, t.id)
+                seen.add(k)
+                state = (table[token_slot(t)], mine and t.id in movable)
+                if self._token_hits.get(k) == state:
+                    continue
+                self._token_hits[k] = state
+                pos, hl = state
+                if hl:
+                    self.hits.add_circle(k, pos, TOKEN_HIT_RADIUS, HIT_MOVABLE,
+                                         (f"move:{t.id}", None), p_idx*TOKENS_PER_PLAYER + i)
+                else:
+                    self.hits.add_circle(k, pos, TOKEN_HIT_RADIUS, HIT_TOKEN,
+                                         ("", None), p_idx*TOKENS_PER_PLAYER + i)
+        for k in [k for k in self._token_hits if k not in seen]:
+            del self._token_hits[k]
+            self.hits.remove(k)
 
     def click(self, pos):
-        if self.btn_roll.hit(pos): return "roll"
-        if self.btn_add.hit(pos): return "add"
-        if self.btn_del.hit(pos): return "del"
-        if self.btn_save.hit(pos): return "save"
-        if self.btn_load.hit(pos): return "load"
-        if self.btn_quit.hit(pos): return "quit"
-        for pidx, tid in self.highlight:
-            token = next(t for t in self.game.players[pidx].tokens if t.id == tid)
-            pos_t = self._token_pos_screen(pidx, token)
-            dx, dy = pos[0]-pos_t[0], pos[1]-pos_t[1]
-            if dx*dx + dy*dy <= (18**2): return f"move:{tid}"
-        return ""
+        self._sync_hits()
+        hit = self.hits.query(pos)
+        if hit is None:
+            return ""
+        act, btn = hit
+        if btn is not None:
+            btn.pressed = True
+        return act
@@ -0,0 +1,152 @@
+# ui_sprites.py
+"""Sprite atlas for the pygame UI.
+
+Image files are read from disk once (load()), converted for fast blitting
+with convert_alpha(), then scaled for a given cell size and packed into a
+single atlas surface (build()). Every sprite is drawn with one
+screen.blit(atlas, pos, area) and nothing is scaled or loaded per frame.
+Atlases are cached per cell size, so a resize to a size seen before is
+free.
+
+The atlas is an opaque surface with a colour key rather than per-pixel
+alpha: the sprites have hard edges (images are flattened onto the window
+background first) and keyed blits are about 4x cheaper than alpha blits.
+No RLEACCEL: blitting a sub-rect of an RLE surface has to walk the rows
+above it, which made token blits slower than drawing circles.
+
+Sprites:
+  ("dice", n)       dice_<n>.png, one cell square
+  ("token", color)  token disc with its drop shadow (drawn, not loaded)
+  "ring"            highlight ring around a movable token
+  "board"           assets/board.png, GRID cells square (the "image" theme)
+
+The pawn_*.png strips under assets/ are slices of a board picture, not
+pawn sprites, so tokens are pre-rendered discs matching the classic look.
+Missing or unreadable files simply leave their sprite out; callers check
+`name in atlas` and fall back to drawing.
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(HERE, "assets")
+BOARD_IMAGE = os.path.join(ASSET_DIR, "board.png")
+# Playing area inside BOARD_IMAGE, within its frame (the rest is backdrop and a dice)
+BOARD_IMAGE_CROP = (87, 312, 850, 827)
+
+SHADOW = (100, 100, 100)
+RING = (245, 245, 245)
+KEY = (255, 0, 255)       # transparent colour of the atlas
+
+def _pack(sizes: List[Tuple[int, int]], width: int) -> Tuple[List[Tuple[int, int]], int]:
+    """Shelf packing, tallest first. Returns the top-left of each size (in
+    input order) and the total height."""
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i][1], reverse=True)
+    spots: List[Tuple[int, int]] = [(0, 0)] * len(sizes)
+    x = y = shelf = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        spots[i] = (x, y)
+        x += w
+        shelf = max(shelf, h)
+    return spots, y + shelf
+
+class SpriteAtlas:
+    def __init__(self, asset_dir: str = ASSET_DIR, board_image: str = BOARD_IMAGE):
+        self.asset_dir = asset_dir
+        self.board_image = board_image
+        self._sources: Optional[Dict[object, pygame.Surface]] = None
+        self._atlases: Dict[tuple, tuple] = {}
+        self.surface: Optional[pygame.Surface] = None
+        self.rects: Dict[object, pygame.Rect] = {}
+        # Where in a sprite the position passed to blit() goes: the disc
+        # centre for tokens and the ring, the top-left corner otherwise
+        self.anchors: Dict[object, Tuple[int, int]] = {}
+
+    def load(self):
+        """Read and convert the image files (once; needs a display mode)."""
+        if self._sources is not None:
+            return
+        self._sources = {}
+        for n in range(1, 7):
+            self._load(("dice", n), os.path.join(self.asset_dir, f"dice_{n}.png"))
+        board = self._load("board", self.board_image)
+        if board is not None:
+            crop = pygame.Rect(BOARD_IMAGE_CROP).clip(board.get_rect())
+            self._sources["board"] = board.subsurface(crop)
+
+    def _load(self, name, path) -> Optional[pygame.Surface]:
+        try:
+            surf = pygame.image.load(path).convert_alpha()
+        except (pygame.error, FileNotFoundError):
+            return None
+        self._sources[name] = surf
+        return surf
+
+    def build(self, cell: int, grid: int, colors: List[Tuple[int, int, int]],
+              background: Tuple[int, int, int] = RING):
+        """Make the atlas for `cell`-pixel squares current (cached)."""
+        key = (cell, grid, tuple(colors), background)
+        cached = self._atlases.get(key)
+        if cached is None:
+            self.load()
+            sprites: Dict[object, pygame.Surface] = {}
+            anchors: Dict[object, Tuple[int, int]] = {}
+            for name, src in self._sources.items():
+                size = (grid * cell,) * 2 if name == "board" else (cell, cell)
+                flat = pygame.Surface(size)
+                flat.fill(background)
+                flat.blit(pygame.transform.smoothscale(src, size), (0, 0))
+                sprites[name] = flat
+                anchors[name] = (0, 0)
+            for color in colors:
+                sprites[("token", color)], anchors[("token", color)] = self._token(cell, color)
+            sprites["ring"], anchors["ring"] = self._ring(cell)
+
+            names = list(sprites)
+            sizes = [sprites[n].get_size() for n in names]
+            width = max(max(w for w, _ in sizes), 8 * cell)
+            spots, height = _pack(sizes, width)
+            atlas = pygame.Surface((width, height)).convert()
+            atlas.fill(KEY)
+            rects = {}
+            for name, (w, h), (x, y) in zip(names, sizes, spots):
+                atlas.blit(sprites[name], (x, y))
+                rects[name] = pygame.Rect(x, y, w, h)
+            atlas.set_colorkey(KEY)
+            cached = self._atlases[key] = (atlas, rects, anchors)
+        self.surface, self.rects, self.anchors = cached
+
+    @staticmethod
+    def _token(cell: int, color) -> Tuple[pygame.Surface, Tuple[int, int]]:
+        # Same shapes as the classic circles: radius 10 disc over a radius
+        # 11 shadow offset by 2 px (at CELL 36)
+        r = max(2, cell * 10 // 36)
+        off = max(1, cell * 2 // 36)
+        size = 2 * (r + 1 + off) + 1
+        surf = pygame.Surface((size, size))
+        surf.fill(KEY)
+        c = r + 1
+        pygame.draw.circle(surf, SHADOW, (c + off, c + off), r + 1)
+        pygame.draw.circle(surf, color, (c, c), r)
+        return surf, (c, c)
+
+    @staticmethod
+    def _ring(cell: int) -> Tuple[pygame.Surface, Tuple[int, int]]:
+        r = max(3, cell * 14 // 36)
+        surf = pygame.Surface((2 * r + 1, 2 * r + 1))
+        surf.fill(KEY)
+        pygame.draw.circle(surf, RING, (r, r), r, width=max(1, cell * 3 // 36))
+        return surf, (r, r)
+
+    def __contains__(self, name) -> bool:
+        return name in self.rects
+
+    def blit(self, screen: pygame.Surface, name, pos: Tuple[int, int]):
+        """One blit of sprite `name`, its anchor placed at `pos`."""
+        ax, ay = self.anchors[name]
+        screen.blit(self.surface, (pos[0] - ax, pos[1] - ay), self.rects[name])